@@ -1,29 +1,65 @@
 from funasr.utils.postprocess_utils import rich_transcription_postprocess
 from unitree_sdk2py.core.channel import ChannelFactoryInitialize
 from unitree_sdk2py.go2.sport.sport_client import SportClient
-from kokoro import KPipeline, KModel
-from pypinyin import lazy_pinyin
+from command_parser import parse_commands
+from wake_word import WakeWordMatcher
+from motion import MotionExecutor
+from flight_recorder import FlightRecorder, RecordingSportClient
+from tts_cache import PhraseCache, tensor_digest
+from startup import StartupManager
+from tracing import Tracer
+from asr_backend import load_sensevoice, configure_cpu, pin_thread, transcribe, transcribe_batch
+from collections import deque
+from tts_backend import load_kokoro, synthesize
+from audio_player import AudioPlayer
+import motion
+from functools import lru_cache
 from playsound import playsound
 from funasr import AutoModel
 import soundfile as sf
-import cn2an
-import torch
+import numpy as np
+import threading
 import time
-import re
+import torch
+import queue
+import math
 import os
 
-# 初始化运动控制及低层状态监控
-ChannelFactoryInitialize(0, "eth0")
-sport_client = SportClient()
-sport_client.SetTimeout(10.0)
-sport_client.Init()
+# 运动控制参数
 state_freq = 10
-print("运动控制初始化完成！")
+motion_rate = 20  # 速度指令下发频率/Hz
+flight_log_path = "flight.log"  # 飞行记录文件（内存映射环形日志）
+flight_log_capacity = 200000  # 飞行记录保留的记录条数
+startup_lazy = False  # True时各组件首次使用才加载，False时导入后立即并行加载
+trace_log_path = None  # 分段计时事件的JSONL文件，None为不记录（直方图始终统计）
+trace_metrics_port = None  # Prometheus /metrics端口，None为不提供
+
+
+def init_sport_client():
+    """初始化运动控制及低层状态监控"""
+    ChannelFactoryInitialize(0, "eth0")
+    client = SportClient()
+    client.SetTimeout(10.0)
+    client.Init()
+    print("运动控制初始化完成！")
+    return client
+
 
 #个性化参数
 stt_recog_model_path = "**/SenseVoiceSmall"
 stt_vad_model_path = "***/fsmn_vad"
+stt_device = "auto"  # 识别设备：auto / cuda:0 / cpu
+stt_precision = "fp32"  # 识别精度：fp32 / int8（仅CPU）
+# PyTorch算子内线程数：torch.set_num_threads为进程级设置，识别与合成共用这一个值，
+# 两个模型并行加载时都按它设置，结果与加载顺序无关；None时沿用funasr加载识别模型时设置的默认值4
+torch_threads = None
+stt_interop_threads = None  # CPU推理算子间线程数（同为进程级设置）
+stt_cpu_affinity = None  # 识别推理线程绑定的CPU核序号列表，如[2, 3, 4, 5]，None为不绑定
+stt_batch_window = 0.05  # 微批等待窗口/s，仅在有多个工作线程时生效，单段录音最多因此多等待该时长
+stt_batch_seconds = 60  # 一批录音的总时长上限/s
+stt_batch_size = 8  # 一批最多的录音段数
 wake_up = ["go to", "gou2", "go 2", "go two", "gou to", "goto"]  # 唤醒词
+wake_distance = 1  # 唤醒词允许的近音音节数（两个音节及以上）及音节编辑距离（三个音节及以上）
 is_wake = 0  # 是否被唤醒，默认不启用
 command_mode = "Interactive"  # 控制模式：规划模式可以识别一连串指令；交互模式则只支持单句话
 validity = 6  # 被唤醒之后的几句话将可被识别
@@ -39,24 +75,172 @@ tts_model = 'hexgrad/Kokoro-82M-v1.1-zh'
 tts_model_path = 'ckpts/kokoro-v1.1/kokoro-v1_1-zh.pth'
 tts_config_path = 'ckpts/kokoro-v1.1/config.json'
 tts_timbre_path = "ckpts/kokoro-v1.1/voices/zm_014.pt"
+tts_sample_rate = 24000
+tts_speed = 1.1
+tts_device = "auto"  # 合成设备：auto / cuda / cpu
+tts_precision = "fp32"  # 合成精度：fp32 / int8（仅CPU）
+tts_cache_path = "voices/cache"  # 短语缓存目录
+tts_cache_memory = 64 << 20  # 短语缓存内存上限/字节
+tts_cache_disk = 512 << 20  # 短语缓存磁盘上限/字节
+tts_cache_max_chars = 40  # 只缓存不超过该长度的句子，长回答每次内容不同
+# 启动时预先合成的提示语，保证错误及确认提示即时播放
+tts_prewarm = ["服务暂时不可用，请稍后再试", "请求超时，请稍后再试", "处理请求时出错", "响应中缺少有效内容",
+               "好的", "收到", "我在"]
+
+
+class SentenceSegmenter:
+    """将流式到达的文本按句末标点切分为完整句子"""
+    endings = "。！？.?!"
+
+    def __init__(self):
+        self.buffer = ""
+
+    def feed(self, text):
+        """送入一段文本，返回其中已完整的句子列表"""
+        self.buffer += text
+        sentences = []
+        start = 0
+        for i, char in enumerate(self.buffer):
+            if char not in self.endings:
+                continue
+            following = self.buffer[i + 1] if i + 1 < len(self.buffer) else None
+            # 数字间的"."是小数点；位于末尾时等待后续内容再判断
+            if char == "." and i > 0 and self.buffer[i - 1].isdigit():
+                if following is None:
+                    break
+                if following.isdigit():
+                    continue
+            # 连续的句末标点归入同一句
+            if following is not None and following in self.endings:
+                continue
+            sentence = self.buffer[start:i + 1].strip()
+            if sentence.strip(self.endings):
+                sentences.append(sentence)
+            start = i + 1
+        self.buffer = self.buffer[start:]
+        return sentences
+
+    def flush(self):
+        """返回缓冲区中剩余的不完整句子"""
+        rest, self.buffer = self.buffer.strip(), ""
+        return rest if rest.strip(self.endings) else ""
 
 
 class Kokoro:
-    def __init__(self, repo_id, model_path, config_path, timbre):
+    def __init__(self, repo_id, model_path, config_path, timbre, cache=None,
+                 device=tts_device, precision=tts_precision):
         print("正在初始化语音生成模型...")
-        device = 'cuda' if torch.cuda.is_available() else 'cpu'
-        self.model = KModel(model=model_path, config=config_path, repo_id=repo_id).to(device).eval()
-        self.zh_pipeline = KPipeline(lang_code='z', repo_id=repo_id, model=self.model)
+        self.model, self.zh_pipeline, self.device = load_kokoro(
+            repo_id, model_path, config_path, device, precision, torch_threads)
         self.timbre_tensor = torch.load(timbre, weights_only=True)
+        self.cache = cache
+        self.voice_digest = tensor_digest(self.timbre_tensor.cpu().numpy())
         print("语音模型初始化完成！")
+
+    def warmup(self, phrases=()):
+        """执行一次不经缓存的合成以完成模型预热，再预合成常用短语"""
+        for _ in synthesize(self.zh_pipeline, "你好", self.timbre_tensor, tts_speed):
+            pass
+        self.prewarm(phrases)
     
+    def synthesize(self, text):
+        """逐段生成语音，每得到一段即返回其float32 PCM；短句优先从缓存读取，合成完整后写入缓存"""
+        key = None
+        if self.cache is not None and len(text) <= tts_cache_max_chars:
+            key = self.cache.key(text, self.voice_digest, tts_speed)
+            pcm = self.cache.get(key)
+            if pcm is not None:
+                yield pcm
+                return
+        segments = []
+        begin = time.perf_counter()
+        for pcm in synthesize(self.zh_pipeline, text, self.timbre_tensor, tts_speed):
+            if not segments:
+                tracer.observe("tts_first_segment", time.perf_counter() - begin)
+            segments.append(pcm)
+            yield pcm
+        tracer.observe("tts", time.perf_counter() - begin)
+        # 中途取消时不会执行到这里，缓存中只有完整的短语
+        if key is not None and segments:
+            self.cache.put(key, np.concatenate(segments))
+
+    def prewarm(self, phrases):
+        """预先合成短语放入缓存，已在磁盘缓存中的直接载入内存"""
+        for phrase in phrases:
+            for _ in self.synthesize(phrase):
+                pass
+        if self.cache is not None:
+            print(f"语音缓存预热完成：{self.cache.stats()}")
+
     def generate(self, text, output_path):
-        # 生成语音
-        self.generator = self.zh_pipeline(text, voice=self.timbre_tensor, speed=1.1)
-        result = next(self.generator)
-        wav = result.audio
-        # 保存文件
-        sf.write(output_path, wav, 24000)
+        # 生成全部分段并拼接后保存，避免长回答被截断
+        segments = list(self.synthesize(text))
+        if not segments:
+            return
+        sf.write(output_path, np.concatenate(segments), tts_sample_rate)
+
+    def speak(self, text, player, cancelled=None):
+        """流式合成：每段生成后立即交给播放器，下一段在播放的同时合成
+
+        cancelled为可选的取消判断函数，返回True时停止合成并丢弃未播放的片段
+        """
+        for pcm in self.synthesize(text):
+            if cancelled and cancelled():
+                player.clear()
+                break
+            player.write(pcm)
+        player.wait()
+
+    def speak_stream(self, chunks, player, cancelled=None, pcm_out=None):
+        """流水线合成：文本块在后台线程中按句切分，第N句播放的同时合成第N+1句并继续接收文本
+
+        chunks为逐块到达的文本（如大模型流式输出），返回已播报的文本；
+        pcm_out为可选的列表，依次追加播放的PCM片段
+        """
+        sentences = queue.Queue()
+
+        def produce():
+            segmenter = SentenceSegmenter()
+            try:
+                for chunk in chunks:
+                    if cancelled and cancelled():
+                        break
+                    for sentence in segmenter.feed(chunk):
+                        sentences.put(sentence)
+                else:
+                    rest = segmenter.flush()
+                    if rest:
+                        sentences.put(rest)
+            except Exception as e:
+                print(f"文本接收出错: {type(e).__name__} - {e}")
+            finally:
+                # 提前结束时关闭生成器，以便断开大模型连接
+                if hasattr(chunks, "close"):
+                    chunks.close()
+                sentences.put(None)
+
+        threading.Thread(target=produce, daemon=True).start()
+        spoken = []
+        started = False
+        while (sentence := sentences.get()) is not None:
+            if cancelled and cancelled():
+                player.clear()
+                continue
+            spoken.append(sentence)
+            for pcm in self.synthesize(sentence):
+                if cancelled and cancelled():
+                    break
+                if not started:
+                    # 自端点检测到首段语音交给播放器的时间
+                    started = True
+                    tracer.mark("first_audio")
+                player.write(pcm)
+                if pcm_out is not None:
+                    pcm_out.append(pcm)
+        if cancelled and cancelled():
+            player.clear()
+        player.wait()
+        return "".join(spoken)
     
     def play_audio(self, audio_path):
         abs_path = os.path.abspath(audio_path)
@@ -64,37 +248,298 @@ class Kokoro:
         playsound(abs_path, block=True)
         
 
+def pcm_to_float32(audio):
+    """将int16或float32录音转换为funasr所需的一维float32(-1~1)数组"""
+    audio = np.asarray(audio).reshape(-1)
+    if audio.dtype == np.int16:
+        return audio.astype(np.float32) / 32768.0
+    return audio.astype(np.float32, copy=False)
+
+
 class AudioProcessor:
-    def __init__(self, model_dir, vad_model):
+    def __init__(self, model_dir, vad_model, device=stt_device, precision=stt_precision):
         # 初始化耗时资源
         print("正在初始化语音识别模型...")
-        self.model = AutoModel(
-            model=model_dir,
-            vad_model=vad_model,  # 将长语音切割成短句
-            vad_kwargs={"max_single_segment_time": 30000},
-            device="cuda:0",
-            disable_download=True,
-            disable_update=True,
-            disable_log=True,
-            disable_pbar=True,
-            log_level='ERROR'
-        )
-        print("语音识别模型初始化完成！")
-
-    def process(self, file_path):
-        # 使用已初始化的资源处理文件
-        result = self.model.generate(
-            input=file_path,
-            cache={},
-            language="zn",  # "zn", "en", "yue", "ja", "ko", "nospeech"
+        self.vad_model_dir = vad_model
+        self.vad_stream_model = None  # 流式端点检测模型，首次创建流式会话时加载
+        self.model, self.device = load_sensevoice(model_dir, vad_model, device, precision, torch_threads)
+        if self.device == "cpu":
+            configure_cpu(torch_threads, stt_interop_threads)
+        print(f"语音识别模型初始化完成！（{self.device}, {precision}）")
+
+    def warmup(self):
+        """用一秒低幅噪声执行一次识别，完成模型预热"""
+        noise = np.random.default_rng(0).normal(0, 0.01, 16000).astype(np.float32)
+        self.process(noise, 16000)
+
+    def process(self, audio, sample_rate=16000):
+        """识别音频文件路径或内存中的录音缓冲区(int16/float32)
+
+        直接传入NumPy缓冲区时省去写盘及funasr重新读取解码的过程，
+        sample_rate为缓冲区采样率，funasr会按需重采样到16kHz
+        """
+        if isinstance(audio, np.ndarray):
+            audio = pcm_to_float32(audio)
+        with tracer.span("asr_inference"):
+            return transcribe(self.model, audio, sample_rate)
+
+    def process_batch(self, audios, sample_rate=16000):
+        """批量识别多段已由录音端点检测切分好的缓冲区，按输入顺序返回文本"""
+        with tracer.span("asr_batch_inference"):
+            return transcribe_batch(self.model, [pcm_to_float32(audio) for audio in audios], sample_rate)
+
+    def recognize_segment(self, audio, sample_rate=16000, cache=None):
+        """识别已由VAD切分好的单段语音，跳过整句VAD"""
+        result = self.model.inference(
+            pcm_to_float32(audio),
+            fs=sample_rate,
+            cache=cache if cache is not None else {},
+            language="zn",
             use_itn=True,
-            batch_size_s=60,
-            merge_vad=True,
-            merge_length_s=15,
             disable_log=True
         )
-        result = rich_transcription_postprocess(result[0]["text"])
-        return result
+        if not result or not result[0].get("text"):
+            return ""
+        return rich_transcription_postprocess(result[0]["text"])
+
+    def load_stream_vad(self):
+        """加载（仅首次）并返回流式端点检测模型"""
+        if self.vad_stream_model is None:
+            print("正在初始化流式端点检测模型...")
+            self.vad_stream_model = AutoModel(
+                model=self.vad_model_dir,
+                device=self.device,
+                disable_download=True,
+                disable_update=True,
+                disable_log=True,
+                disable_pbar=True,
+                log_level='ERROR'
+            )
+        return self.vad_stream_model
+
+    def create_stream(self, sample_rate, on_partial=None, on_final=None, **kwargs):
+        """创建流式识别会话，回调在会话线程中执行"""
+        self.load_stream_vad()
+        return StreamingRecognizer(self, sample_rate, on_partial, on_final, **kwargs)
+
+
+class BatchRequest:
+    def __init__(self, audio, sample_rate):
+        self.audio = audio
+        self.sample_rate = sample_rate
+        self.duration = len(audio) / sample_rate
+        self.arrived = time.monotonic()
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class BatchingRecognizer:
+    """微批识别前端：窗口内陆续到达的多段录音合并为一次批量推理，结果分别返回给各调用方
+
+    多个工作线程同时调用process()时才会成批；只有一段录音时按原流程识别，最多多等待window秒。
+    max_callers为可能同时调用process()的线程数（即语音处理工作线程数），
+    排队数已达到该值时不会再有录音到来，直接开始识别；为1时从不等待窗口
+    """
+    def __init__(self, processor, window=stt_batch_window, max_seconds=stt_batch_seconds, max_batch=stt_batch_size,
+                 max_callers=1):
+        self.processor = processor
+        self.window = window
+        self.max_callers = max_callers
+        self.max_seconds = max_seconds
+        self.max_batch = max_batch
+        self.pending = deque()
+        self.batches = 0
+        self.batched_requests = 0
+        self._cond = threading.Condition()
+        threading.Thread(target=self._run, name="asr-batcher", daemon=True).start()
+
+    def process(self, audio, sample_rate=16000):
+        """与AudioProcessor.process相同，阻塞直到本段录音识别完成"""
+        if not isinstance(audio, np.ndarray):
+            return self.processor.process(audio, sample_rate)
+        request = BatchRequest(audio, sample_rate)
+        with self._cond:
+            self.pending.append(request)
+            self._cond.notify_all()
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _full(self):
+        return (len(self.pending) >= min(self.max_batch, self.max_callers)
+                or sum(r.duration for r in self.pending) >= self.max_seconds)
+
+    def _take_batch(self):
+        # 调用方持有锁；同一批次的采样率必须一致
+        batch = [self.pending.popleft()]
+        total = batch[0].duration
+        while self.pending and len(batch) < self.max_batch:
+            request = self.pending[0]
+            if request.sample_rate != batch[0].sample_rate or total + request.duration > self.max_seconds:
+                break
+            batch.append(self.pending.popleft())
+            total += request.duration
+        return batch
+
+    def _run(self):
+        # 整句识别均在本线程中推理，只绑定本线程（及其创建的推理工作线程）
+        pin_thread(stt_cpu_affinity)
+        while True:
+            with self._cond:
+                while not self.pending:
+                    self._cond.wait()
+                deadline = self.pending[0].arrived + self.window
+                while not self._full() and (remaining := deadline - time.monotonic()) > 0:
+                    self._cond.wait(remaining)
+                batch = self._take_batch()
+            try:
+                if len(batch) == 1:
+                    results = [self.processor.process(batch[0].audio, batch[0].sample_rate)]
+                else:
+                    results = self.processor.process_batch([r.audio for r in batch], batch[0].sample_rate)
+                    self.batches += 1
+                    self.batched_requests += len(batch)
+                for request, result in zip(batch, results):
+                    request.result = result
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+            finally:
+                for request in batch:
+                    request.done.set()
+
+
+class StreamingRecognizer:
+    """流式识别会话
+
+    录音块逐块送入FSMN VAD，语音进行中每隔partial_interval秒解码一次得到部分结果，
+    VAD检测到端点后立即输出最终结果；若最近一次部分结果已覆盖到端点则直接复用。
+    VAD与识别模型的cache在整个会话内保持。
+    """
+    def __init__(self, processor, sample_rate, on_partial=None, on_final=None,
+                 chunk_ms=200, partial_interval=0.6, endpoint_ms=500, preroll=1.0):
+        self.processor = processor
+        self.sample_rate = sample_rate
+        self.on_partial = on_partial
+        self.on_final = on_final
+        self.chunk_ms = chunk_ms
+        self.chunk_samples = int(sample_rate * chunk_ms / 1000)
+        self.partial_samples = int(sample_rate * partial_interval)
+        self.endpoint_ms = endpoint_ms
+        self.preroll_samples = int(sample_rate * preroll)
+        self.vad_cache = {}
+        self.asr_cache = {}
+
+        # 音频缓存按容量倍增，self.audio[0]对应全局采样序号self.offset
+        self.audio = np.zeros(sample_rate * 4, dtype=np.float32)
+        self.size = 0
+        self.offset = 0
+        self.fed = 0  # 已送入VAD的全局采样序号
+        self.speech_start = None  # 当前语音段起点（全局采样序号）
+        self.partial_end = 0  # 最近一次部分结果覆盖到的全局采样序号
+        self.partial_text = ""
+
+        self.queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def push(self, block):
+        """由音频回调调用：仅拷贝入队，推理在会话线程中完成"""
+        self.queue.put(np.array(block, dtype=np.int16).reshape(-1))
+
+    def close(self):
+        """结束会话，尚未结束的语音段作为最终结果输出"""
+        self.queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        pin_thread(stt_cpu_affinity)
+        while True:
+            block = self.queue.get()
+            try:
+                if block is None:
+                    self._feed(final=True)
+                    return
+                self._append(block)
+                if self.offset + self.size - self.fed >= self.chunk_samples:
+                    self._feed()
+            except Exception as e:
+                print(f"流式识别出错: {type(e).__name__} - {e}")
+
+    def _append(self, block):
+        end = self.size + len(block)
+        if end > len(self.audio):
+            grown = np.empty(max(end, 2 * len(self.audio)), dtype=np.float32)
+            grown[:self.size] = self.audio[:self.size]
+            self.audio = grown
+        self.audio[self.size:end] = pcm_to_float32(block)
+        self.size = end
+
+    def _segment(self, start, end):
+        return self.audio[max(start - self.offset, 0):end - self.offset].copy()
+
+    def _feed(self, final=False):
+        chunk = self.audio[self.fed - self.offset:self.size]
+        self.fed = self.offset + self.size
+        result = self.processor.vad_stream_model.generate(
+            input=chunk,
+            fs=self.sample_rate,
+            cache=self.vad_cache,
+            is_final=final,
+            chunk_size=self.chunk_ms,
+            max_end_silence_time=self.endpoint_ms,
+            disable_pbar=True
+        )
+        # VAD输出毫秒时间戳：[beg, -1]为起点，[-1, end]为终点，[beg, end]为完整语音段
+        for beg, end in (result[0]["value"] if result else []):
+            if beg != -1:
+                self.speech_start = int(beg * self.sample_rate / 1000)
+                self.partial_end = self.speech_start
+                self.partial_text = ""
+            if end != -1 and self.speech_start is not None:
+                self._finish(int(end * self.sample_rate / 1000))
+
+        if final and self.speech_start is not None:
+            self._finish(self.offset + self.size)
+        if self.speech_start is None:
+            self._trim()
+        elif self.queue.empty() and self.offset + self.size - self.partial_end >= self.partial_samples:
+            # 仅在没有积压时解码部分结果，避免推理慢于实时时延迟累积
+            self._partial()
+
+    def _partial(self):
+        end = self.offset + self.size
+        text = self.processor.recognize_segment(self._segment(self.speech_start, end), self.sample_rate, self.asr_cache)
+        self.partial_end, self.partial_text = end, text
+        if text and self.on_partial:
+            self.on_partial(text)
+
+    def _finish(self, end):
+        if self.partial_text and self.partial_end >= end:
+            text = self.partial_text
+        else:
+            text = self.processor.recognize_segment(self._segment(self.speech_start, end), self.sample_rate, self.asr_cache)
+        self.speech_start = None
+        self.partial_text = ""
+        if text and self.on_final:
+            self.on_final(text)
+
+    def _trim(self):
+        # 非语音状态下只保留预录音长度的音频
+        keep = min(self.size, self.preroll_samples)
+        drop = self.size - keep
+        if drop > 0:
+            self.audio[:keep] = self.audio[drop:self.size]
+            self.offset += drop
+            self.size = keep
+
+
+@lru_cache(maxsize=16)
+def is_wake_word(result):
+    """判断识别结果中是否包含唤醒词（按拼音音节匹配），同一识别结果只转换一次"""
+    return wake_matcher.search(result) is not None
 
 
 # 指令控制处理函数
@@ -119,13 +564,11 @@ def speech2cmd(result, exec_flag):
                 flag = planning_execute(content, flag)
         return flag
     
-    for word in wake_up:
-        if ''.join(lazy_pinyin(word)) in ''.join(lazy_pinyin(result)):
-            is_wake = 1
-            print("detect wake-up word")
-            validity = 6
-            exec_flag = process_command(result, exec_flag)
-            break
+    if is_wake_word(result):
+        is_wake = 1
+        print("detect wake-up word")
+        validity = 6
+        exec_flag = process_command(result, exec_flag)
     if not is_wake and validity:
         print(f"validity remain {validity} times")
         validity -= 1
@@ -133,69 +576,52 @@ def speech2cmd(result, exec_flag):
     return exec_flag
 
 
-def interact_execute(command, get_cmd):
-    global execution
-    print(f"interactive mode: {command}")
+def command_motions(command):
+    """将一条解析后的指令转换为动作序列，无法执行时返回None"""
     global default_distance, default_speed
-    move_pattern = re.compile(r'([前后])走?(\d+|[零一二三四五六七八九十百]+)?米?')
-    turn_pattern = re.compile(r'([左右])转?(\d+|[零一二三四五六七八九十百]+)?度?')
-    setting_pattern = re.compile(r'(上调|增大|减小|下调)默认(速度|距离)')
-    
-    # 尝试匹配移动指令（走）
-    if match := move_pattern.search(command):
+    if command.action == "move":
         print("forward or backward detected")
         speed = speed_list[default_speed]
-        direction = speed if match.group(1) == "前" else -speed
-        # 提取距离或使用默认值
-        step = int(cn2an.cn2an(match.group(2), "smart") / speed) if match.group(2) else int(default_distance / speed)
-        print(f"direction:{direction}, step:{step}")
-        for i in range(step):
-            sport_client.Move(direction, 0, 0)
-            time.sleep(1)
-        get_cmd = 1
+        # 未说明距离时使用默认值
+        distance = command.amount if command.amount is not None else default_distance
+        print(f"direction:{command.direction * speed}, time:{distance / speed:.1f}s")
+        return [motion.velocity(command.direction * speed, 0, 0, distance / speed)]
     
-    # 尝试匹配旋转指令（转）
-    elif match := turn_pattern.search(command):
+    if command.action == "turn":
         print("left or right detected")
-        angle_list = [0, 45, 90, 135, 180]
-        direction = 1 if match.group(1) == "左" else -1
-        # 提取角度或使用默认值
-        angle = cn2an.cn2an(match.group(2), "smart") if match.group(2) else default_angle
-        for i in range(len(angle_list)):
-            if angle_list[i] < angle <= angle_list[i + 1]:
-                angle = angle / (i + 1)
-                distance = 3 * (i + 1)
-                break
-        print(f"abgle:{angle}, step:{distance}")
-        for i in range(distance):
-            sport_client.Move(0, 0, direction * angle / 180 * 3.14)
-            time.sleep(1)
-        get_cmd = 1
+        angle = command.amount if command.amount is not None else default_angle
+        # 按45度分档，每档旋转3秒
+        bucket = min(max(math.ceil(angle / 45), 1), 4)
+        angle, duration = angle / bucket, 3 * bucket
+        print(f"angle:{angle}, time:{duration}s")
+        return [motion.velocity(0, 0, command.direction * angle / 180 * 3.14, duration)]
     
-    elif "站起" in command:
-        sport_client.StandUp()
-        time.sleep(0.5)
-        sport_client.BalanceStand()
-        get_cmd = 1
-    elif "坐下" in command:
-        sport_client.StandDown()
+    if command.action == "stand":
+        return [motion.call("StandUp"), motion.wait(0.5), motion.call("BalanceStand")]
+    if command.action == "sit":
+        return [motion.call("StandDown")]
+    if command.action == "stop":
+        return [motion.call("StopMove")]
+    if command.action == "setting":
+        if command.target == "速度" and 0 <= default_speed + command.direction < len(speed_list):
+            default_speed += command.direction
+        elif command.target == "距离" and 1 <= default_distance <= 5:
+            default_distance += command.direction
+        else:
+            return None
+        # 切换步态作为设置成功的反馈
+        return [motion.call("SwitchGait", 1), motion.wait(1), motion.call("SwitchGait", 0)]
+    return None
+
+
+def interact_execute(command, get_cmd):
+    print(f"interactive mode: {command}")
+    commands = parse_commands(command)
+    motions = command_motions(commands[0]) if commands else None
+    if motions:
+        # 入队后立即返回，新指令抢占正在执行的动作
+        motion_executor.submit(motions)
         get_cmd = 1
-    elif match := setting_pattern.search(command):
-        action, target = match.group(1), match.group(2)
-        if target == "速度" and 0 <= default_speed <= 2:
-            default_speed += 1 if action in ["上调", "增大"] else -1
-            
-            sport_client.SwitchGait(1)
-            time.sleep(1)
-            sport_client.SwitchGait(0)
-            get_cmd = 1
-        if target == "距离" and 1 <= default_distance <= 5:
-            default_distance += 1 if action in ["上调", "增大"] else -1
-            
-            sport_client.SwitchGait(1)
-            time.sleep(1)
-            sport_client.SwitchGait(0)
-            get_cmd = 1
     else:
         get_cmd = 0
         print("interactive mode: no matched results")
@@ -203,67 +629,37 @@ def interact_execute(command, get_cmd):
 
 
 def planning_execute(text, get_cmd):
-    global default_distance, default_speed, execution
-    move_pattern = re.compile(r'([前后])走?(\d+|[零一二三四五六七八九十百]+)?米?')
-    turn_pattern = re.compile(r'([左右])转?(\d+|[零一二三四五六七八九十百]+)?度?')
-    
-    command_list = split_command(text)
-    print(f"planning mode: {command_list}")
-    for command in command_list:
-        if match := move_pattern.search(command):
-            print("forward or backward detected")
-            speed = speed_list[default_speed]
-            direction = speed if match.group(1) == "前" else -speed
-            # 提取距离或使用默认值
-            if match.group(2):
-                print(f"步为{int(cn2an.cn2an(match.group(2), 'smart')) / speed}")
-            step = int(cn2an.cn2an(match.group(2), "smart") / speed) if match.group(2) else int(
-                default_distance / speed)
-            print(f"direction:{direction}, step:{step}")
-            for i in range(step):
-                sport_client.Move(direction, 0, 0)
-                time.sleep(1)
-            get_cmd = 1
-        
-        # 尝试匹配旋转指令（转）
-        elif match := turn_pattern.search(command):
-            print("left or right detected")
-            angle_list = [0, 45, 90, 135, 180]
-            direction = 1 if match.group(1) == "左" else -1
-            # 提取角度或使用默认值
-            angle = cn2an.cn2an(match.group(2), "smart") if match.group(2) else default_angle
-            for i in range(len(angle_list)):
-                if angle_list[i] < angle <= angle_list[i + 1]:
-                    angle = angle / (i + 1)
-                    distance = 3 * (i + 1)
-                    break
-            print(f"abgle:{angle}, step:{distance}")
-            for i in range(distance):
-                sport_client.Move(0, 0, direction * angle / 180 * 3.14)
-                time.sleep(1)
-            get_cmd = 1
+    commands = parse_commands(text)
+    print(f"planning mode: {commands}")
+    plan = []
+    for command in commands:
+        motions = command_motions(command)
+        if motions:
+            plan.extend(motions)
+    if plan:
+        # 整个计划作为一个动作序列入队，替换尚未执行完的旧计划
+        motion_executor.submit(plan)
+        get_cmd = 1
     return get_cmd
 
 
-def split_command(text):
-    result = []
-    current = []
-    
-    for char in text:
-        if char in '，。':  # 遇到逗号或句号
-            if current:  # 确保当前片段非空
-                result.append(''.join(current))
-                current = []
-        else:
-            current.append(char)
-    
-    # 处理最后一个片段（如果存在）
-    if current:
-        result.append(''.join(current))
-    
-    return result
-
-
 # 创建全局单例实例
-tts_generator = Kokoro(tts_model, tts_model_path, tts_config_path, tts_timbre_path)
-stt_processor = AudioProcessor(stt_recog_model_path, stt_vad_model_path)
+tracer = Tracer(trace_log_path, trace_metrics_port)
+# 运动控制、语音合成、语音识别并行加载，此处得到的是代理对象，首次使用时等待对应组件就绪
+startup = StartupManager(lazy=startup_lazy)
+sport_client = startup.add("dds", init_sport_client)
+tts_generator = startup.add(
+    "tts",
+    lambda: Kokoro(tts_model, tts_model_path, tts_config_path, tts_timbre_path,
+                   PhraseCache(tts_cache_path, tts_cache_memory, tts_cache_disk)),
+    warmup=lambda tts: tts.warmup(tts_prewarm))
+stt_processor = startup.add(
+    "asr",
+    lambda: AudioProcessor(stt_recog_model_path, stt_vad_model_path),
+    warmup=lambda stt: stt.warmup())
+stt_batcher = BatchingRecognizer(stt_processor)
+wake_matcher = WakeWordMatcher(wake_up, wake_distance)
+flight_recorder = FlightRecorder(flight_log_path, flight_log_capacity)
+# 经由记录代理下发运动指令，每次SportClient调用都写入飞行记录
+motion_executor = MotionExecutor(RecordingSportClient(sport_client, flight_recorder), motion_rate)
+audio_player = AudioPlayer(tts_sample_rate)
@@ -0,0 +1,111 @@
+from collections import OrderedDict, namedtuple
+from pypinyin import lazy_pinyin
+import numpy as np
+import unicodedata
+import threading
+import time
+import re
+
+
+"""
+大模型回答缓存
+以规范化后的识别结果为键缓存回答文本（可附带合成好的语音），常见问题命中后不再请求网络和合成模型。
+规范化：全角转半角、去除标点与空白、英文转小写，可选再转为拼音以合并同音字识别差异。
+条目超过ttl秒即失效（读到时删除，写入新条目时清理全部过期条目），条目数超过max_entries时淘汰最久未使用的条目。
+语音以int16单独保存，总字节数超过max_audio_bytes时丢弃最久未使用条目的语音（回答文本保留）。
+"""
+
+Entry = namedtuple("Entry", ["answer", "audio", "created"])
+PUNCTUATION = re.compile(r"[\W_]+")
+
+
+class AnswerCache:
+    def __init__(self, ttl=600, max_entries=256, use_pinyin=False, max_audio_bytes=16 << 20):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.use_pinyin = use_pinyin
+        self.max_audio_bytes = max_audio_bytes
+        self.entries = OrderedDict()
+        self.audio = OrderedDict()  # 键 -> int16语音，按最近使用顺序
+        self.audio_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def normalize(self, text):
+        text = PUNCTUATION.sub("", unicodedata.normalize("NFKC", text)).lower()
+        if self.use_pinyin:
+            text = " ".join(lazy_pinyin(text))
+        return text
+
+    def get(self, query, route=""):
+        """返回未过期的Entry（audio为float32 PCM或None），未命中时返回None"""
+        key = (route, self.normalize(query))
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and time.monotonic() - entry.created > self.ttl:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            samples = self.audio.get(key)
+            if samples is None:
+                return entry
+            self.audio.move_to_end(key)
+        return entry._replace(audio=samples.astype(np.float32) / 32767)
+
+    def put(self, query, answer, route="", audio=None):
+        key = (route, self.normalize(query))
+        if not key[1] or not answer:
+            return
+        now = time.monotonic()
+        with self._lock:
+            # 过期条目只在读到时删除，写入时顺带清理，避免不再被问到的回答一直占用内存
+            for expired in [k for k, e in self.entries.items() if now - e.created > self.ttl]:
+                self._remove(expired)
+            self._remove(key)
+            self.entries[key] = Entry(answer, None, now)
+            while len(self.entries) > self.max_entries:
+                self._remove(next(iter(self.entries)))
+            if audio is not None and key in self.entries:
+                self._store_audio(key, audio)
+
+    def attach_audio(self, query, audio, route=""):
+        """为已缓存的回答附加合成语音，回答已被淘汰时忽略"""
+        key = (route, self.normalize(query))
+        with self._lock:
+            if key in self.entries and key not in self.audio:
+                self._store_audio(key, audio)
+
+    def _store_audio(self, key, pcm):
+        # 调用方持有锁
+        samples = (np.clip(np.asarray(pcm, dtype=np.float32), -1, 1) * 32767).astype(np.int16)
+        if samples.nbytes > self.max_audio_bytes:
+            return
+        self.audio[key] = samples
+        self.audio_bytes += samples.nbytes
+        while self.audio_bytes > self.max_audio_bytes:
+            _, evicted = self.audio.popitem(last=False)
+            self.audio_bytes -= evicted.nbytes
+
+    def _remove(self, key):
+        # 调用方持有锁
+        self.entries.pop(key, None)
+        samples = self.audio.pop(key, None)
+        if samples is not None:
+            self.audio_bytes -= samples.nbytes
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self.entries),
+                "audio_entries": len(self.audio),
+                "audio_bytes": self.audio_bytes,
+            }
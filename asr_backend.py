@@ -0,0 +1,102 @@
+from funasr.utils.postprocess_utils import rich_transcription_postprocess
+from funasr import AutoModel
+import torch
+import os
+
+
+"""
+SenseVoice推理后端
+按设备及精度加载识别模型，供AudioProcessor与基准测试共用：
+    device     auto（有GPU时用cuda:0，否则cpu）/ cuda:0 / cpu
+    precision  fp32 / int8（仅CPU，对线性层做动态int8量化，模型体积及矩阵乘开销约减为四分之一）
+CPU推理时可指定算子内/算子间线程数（均为进程级设置，与合成模型共用），并把执行推理的线程绑定到指定CPU核上：
+绑定在推理线程首次计算之前进行，之后由它创建的OpenMP工作线程继承该绑定，
+录音回调、运动控制、DDS等其他线程不受影响，仍可使用全部核心。
+"""
+
+
+def resolve_device(device="auto"):
+    if device == "auto":
+        return "cuda:0" if torch.cuda.is_available() else "cpu"
+    return device
+
+
+def configure_cpu(threads=None, interop_threads=None):
+    """设置PyTorch线程数"""
+    if threads:
+        torch.set_num_threads(threads)
+    if interop_threads:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError:
+            # 只能在首次并行计算前设置一次
+            print("⚠️ 算子间线程数已生效，无法再次设置")
+
+
+def pin_thread(affinity):
+    """把调用线程绑定到affinity列出的CPU核，需在该线程首次推理之前调用
+
+    Linux下sched_setaffinity(0)只作用于调用线程，此后该线程创建的推理工作线程继承绑定
+    """
+    if not affinity or not hasattr(os, "sched_setaffinity"):
+        return
+    try:
+        os.sched_setaffinity(0, set(affinity))
+    except OSError as e:
+        print(f"⚠️ 绑定CPU核失败：{e}")
+
+
+def load_sensevoice(model_dir, vad_model, device="auto", precision="fp32", threads=None):
+    """返回(AutoModel, 实际使用的设备)；threads为None时不传ncpu，由funasr按其默认值4设置线程数"""
+    if precision not in ("fp32", "int8"):
+        raise ValueError(f"unknown precision: {precision}")
+    device = resolve_device(device)
+    if precision == "int8" and device != "cpu":
+        raise ValueError("int8 quantization is only supported on cpu")
+    # funasr加载时按ncpu调用torch.set_num_threads
+    kwargs = {"ncpu": threads} if threads else {}
+    model = AutoModel(
+        model=model_dir,
+        vad_model=vad_model,  # 将长语音切割成短句
+        vad_kwargs={"max_single_segment_time": 30000},
+        device=device,
+        disable_download=True,
+        disable_update=True,
+        disable_log=True,
+        disable_pbar=True,
+        log_level='ERROR',
+        **kwargs
+    )
+    if precision == "int8":
+        model.model = torch.quantization.quantize_dynamic(model.model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model, device
+
+
+def transcribe(model, audio, sample_rate=16000):
+    """识别音频文件路径或float32波形，返回后处理后的文本"""
+    result = model.generate(
+        input=audio,
+        fs=sample_rate,
+        cache={},
+        language="zn",  # "zn", "en", "yue", "ja", "ko", "nospeech"
+        use_itn=True,
+        batch_size_s=60,
+        merge_vad=True,
+        merge_length_s=15,
+        disable_log=True
+    )
+    return rich_transcription_postprocess(result[0]["text"])
+
+
+def transcribe_batch(model, audios, sample_rate=16000):
+    """一次前向识别多段已切分好的float32波形（跳过整句VAD），按输入顺序返回文本"""
+    results = model.inference(
+        list(audios),
+        fs=sample_rate,
+        cache={},
+        language="zn",
+        use_itn=True,
+        batch_size=len(audios),
+        disable_log=True
+    )
+    return [rich_transcription_postprocess(result.get("text", "")) for result in results]
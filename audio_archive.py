@@ -0,0 +1,184 @@
+from collections import deque
+import soundfile as sf
+import itertools
+import threading
+import argparse
+import queue
+import json
+import time
+import os
+
+
+"""
+音频归档
+录音及回答语音入队即返回，由后台线程压缩编码（默认FLAC）后写入磁盘，实时路径上没有文件读写。
+每次启动为一个会话，文件写入 目录/会话/序号_类型.flac，
+每个文件在 目录/index.jsonl 中追加一行：
+    {"session": 会话, "file": 相对路径, "kind": 类型, "time": 时间戳, "seconds": 时长, "bytes": 文件大小, "text": 识别结果}
+回答语音的text为它所回答的识别结果。
+总大小超过max_bytes或文件早于max_age时从最早的文件开始删除（删到上限的90%，避免每次写入都重写索引）。
+查看归档：python audio_archive.py recordings [--session 会话]
+"""
+
+SUBTYPES = {"FLAC": "PCM_16", "OGG": "VORBIS", "WAV": "PCM_16"}
+INDEX_NAME = "index.jsonl"
+
+
+def load_index(directory):
+    """读取索引，跳过文件已不存在的条目，按写入顺序返回"""
+    entries = []
+    try:
+        with open(os.path.join(directory, INDEX_NAME), encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # 写入中断留下的不完整行
+                if os.path.exists(os.path.join(directory, entry["file"])):
+                    entries.append(entry)
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def summarize_sessions(entries):
+    """按会话汇总：{会话: {"files", "bytes", "seconds", "start", "end"}}"""
+    sessions = {}
+    for entry in entries:
+        session = sessions.setdefault(entry["session"], {"files": 0, "bytes": 0, "seconds": 0.0,
+                                                         "start": entry["time"], "end": entry["time"]})
+        session["files"] += 1
+        session["bytes"] += entry["bytes"]
+        session["seconds"] += entry["seconds"]
+        session["end"] = entry["time"]
+    return sessions
+
+
+class AudioArchive:
+    def __init__(self, directory, max_bytes=512 << 20, max_age=None, format="FLAC", max_pending=32):
+        if format not in SUBTYPES:
+            raise ValueError(f"unknown format: {format}")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age  # 秒，None为不按时间删除
+        self.format = format
+        self.session = time.strftime("%Y%m%d_%H%M%S")
+        self.written = 0
+        self.dropped = 0
+        self.removed = 0
+        self.queue = queue.Queue(max_pending)
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self.entries = deque(load_index(directory))
+        self.total_bytes = sum(entry["bytes"] for entry in self.entries)
+        self._prune(time.time(), rewrite=True)  # 同时清除索引中文件已不存在的条目
+        threading.Thread(target=self._run, name="audio-archive", daemon=True).start()
+
+    def record(self, kind, audio, sample_rate, text=""):
+        """排队归档一段单声道音频（int16或float32），队列已满时丢弃并返回False"""
+        try:
+            self.queue.put_nowait((next(self._seq), kind, time.time(), audio, sample_rate, text))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self):
+        """阻塞直到已排队的音频全部写入"""
+        self.queue.join()
+
+    def stats(self):
+        with self._lock:
+            return {"files": len(self.entries), "bytes": self.total_bytes, "written": self.written,
+                    "dropped": self.dropped, "removed": self.removed, "pending": self.queue.qsize()}
+
+    def sessions(self):
+        with self._lock:
+            return summarize_sessions(list(self.entries))
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                self._write(*item)
+            except Exception as e:
+                print(f"音频归档失败：{type(e).__name__} - {e}")
+            finally:
+                self.queue.task_done()
+
+    def _write(self, seq, kind, created, audio, sample_rate, text):
+        relative = os.path.join(self.session, f"{seq:05d}_{kind}.{self.format.lower()}")
+        path = os.path.join(self.directory, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        sf.write(path, audio, sample_rate, format=self.format, subtype=SUBTYPES[self.format])
+        entry = {"session": self.session, "file": relative, "kind": kind, "time": round(created, 3),
+                 "seconds": round(len(audio) / sample_rate, 2), "bytes": os.path.getsize(path), "text": text}
+        with open(os.path.join(self.directory, INDEX_NAME), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        with self._lock:
+            self.entries.append(entry)
+            self.total_bytes += entry["bytes"]
+            self.written += 1
+        self._prune(time.time())
+
+    def _expired(self, entry, now):
+        return self.max_age is not None and now - entry["time"] > self.max_age
+
+    def _prune(self, now, rewrite=False):
+        """超出大小上限时删到上限的90%，并删除过期文件；有删除时重写索引"""
+        target = self.max_bytes * 0.9 if self.total_bytes > self.max_bytes else self.total_bytes
+        removed = []
+        with self._lock:
+            while self.entries and (self.total_bytes > target or self._expired(self.entries[0], now)):
+                entry = self.entries.popleft()
+                self.total_bytes -= entry["bytes"]
+                removed.append(entry)
+            self.removed += len(removed)
+            remaining = list(self.entries)
+        for entry in removed:
+            path = os.path.join(self.directory, entry["file"])
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            try:
+                os.rmdir(os.path.dirname(path))  # 会话目录已空时一并删除
+            except OSError:
+                pass
+        if removed or rewrite:
+            # 先写临时文件再改名，中途断电也不会丢失索引
+            index_path = os.path.join(self.directory, INDEX_NAME)
+            with open(index_path + ".tmp", "w", encoding="utf-8") as f:
+                for entry in remaining:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            os.replace(index_path + ".tmp", index_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="音频归档查看")
+    parser.add_argument("directory")
+    parser.add_argument("--session", help="列出该会话的全部文件及识别结果")
+    args = parser.parse_args()
+
+    entries = load_index(args.directory)
+    if not entries:
+        print("归档为空")
+        return
+    if args.session:
+        for entry in entries:
+            if entry["session"] == args.session:
+                print(f"{time.strftime('%H:%M:%S', time.localtime(entry['time']))} {entry['kind']} "
+                      f"{entry['seconds']:.1f}s {entry['file']} {entry['text']}")
+        return
+    sessions = summarize_sessions(entries)
+    print(f"共{len(sessions)}个会话，{len(entries)}个文件，{sum(e['bytes'] for e in entries) / (1 << 20):.1f}MB")
+    for name, session in sessions.items():
+        print(f"{name}: {session['files']}个文件，{session['seconds']:.0f}s，{session['bytes'] / (1 << 20):.1f}MB，"
+              f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(session['start']))} ~ "
+              f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(session['end']))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import sounddevice as sd
+import numpy as np
+import threading
+import queue
+
+
+"""
+流式播放
+合成结果按片段送入播放队列即返回，独立线程按到达顺序写入常驻的输出流，合成与播放相互重叠。
+Processor与独立的合成客户端共用同一实现。
+"""
+
+
+class AudioPlayer:
+    """流式播放器：独立线程按到达顺序播放PCM片段，使合成与播放相互重叠"""
+    def __init__(self, sample_rate):
+        self.sample_rate = sample_rate
+        self.queue = queue.Queue()
+        self.stream = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, pcm):
+        """送入一段float32单声道PCM，立即返回"""
+        self.queue.put(np.asarray(pcm, dtype=np.float32).reshape(-1))
+
+    def wait(self):
+        """阻塞直到已送入的片段全部播放完毕"""
+        self.queue.join()
+
+    def clear(self):
+        """丢弃尚未播放的片段，用于打断正在播报的回答"""
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                return
+            self.queue.task_done()
+
+    def _run(self):
+        while True:
+            pcm = self.queue.get()
+            try:
+                # 输出流常驻，避免每段回复都重新打开设备
+                if self.stream is None:
+                    self.stream = sd.OutputStream(samplerate=self.sample_rate, channels=1, dtype="float32")
+                    self.stream.start()
+                self.stream.write(pcm)
+            except Exception as e:
+                print(f"播放失败: {type(e).__name__} - {e}")
+            finally:
+                self.queue.task_done()
@@ -0,0 +1,87 @@
+import numpy as np
+import argparse
+import glob
+import json
+import time
+import wave
+import os
+
+from asr_backend import load_sensevoice, configure_cpu, pin_thread, transcribe
+
+
+"""
+语音识别实时率基准测试
+对同一组wav文件依次用各配置（精度:线程数）加载SenseVoice并识别，
+输出实时率（识别耗时/音频时长，越小越快）、加载耗时，以及与第一个配置识别结果一致的文件比例。
+用法：python -m benchmarks.bench_asr fixtures/asr --model-dir SenseVoiceSmall --vad-model fsmn_vad --configs fp32:4 int8:4 int8:2
+"""
+
+
+def load_wav(wav_path):
+    with wave.open(wav_path, "rb") as f:
+        if f.getnchannels() != 1 or f.getsampwidth() != 2:
+            raise ValueError(f"{wav_path}: 需要单声道int16 wav")
+        sample_rate = f.getframerate()
+        audio = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+    return audio.astype(np.float32) / 32768, sample_rate
+
+
+def run_config(precision, threads, fixtures, args):
+    begin = time.perf_counter()
+    model, device = load_sensevoice(args.model_dir, args.vad_model, args.device, precision, threads)
+    if device == "cpu":
+        configure_cpu(threads)
+    load_time = time.perf_counter() - begin
+
+    # 首个文件预热一次，不计入耗时
+    transcribe(model, *fixtures[0][1:])
+    elapsed = 0
+    duration = 0
+    texts = []
+    for _ in range(args.repeat):
+        texts = []
+        for _, audio, sample_rate in fixtures:
+            begin = time.perf_counter()
+            texts.append(transcribe(model, audio, sample_rate))
+            elapsed += time.perf_counter() - begin
+            duration += len(audio) / sample_rate
+    return {
+        "precision": precision,
+        "threads": threads,
+        "device": device,
+        "load_s": round(load_time, 2),
+        "audio_s": round(duration, 1),
+        "rtf": round(elapsed / duration, 4),
+    }, texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="语音识别实时率基准测试")
+    parser.add_argument("fixtures", help="wav文件目录")
+    parser.add_argument("--model-dir", required=True)
+    parser.add_argument("--vad-model", required=True)
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--configs", nargs="+", default=["fp32:4", "int8:4"], help="精度:线程数")
+    parser.add_argument("--affinity", type=int, nargs="*", help="绑定的CPU核序号")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+    # 基准测试在主线程中推理，加载模型前绑定主线程
+    pin_thread(args.affinity)
+
+    paths = sorted(glob.glob(os.path.join(args.fixtures, "*.wav")))
+    if not paths:
+        parser.error("夹具目录中没有wav文件")
+    fixtures = [(path, *load_wav(path)) for path in paths]
+
+    reference = None
+    for config in args.configs:
+        precision, _, threads = config.partition(":")
+        result, texts = run_config(precision, int(threads) if threads else None, fixtures, args)
+        if reference is None:
+            reference = texts
+        result["agreement"] = round(sum(a == b for a, b in zip(texts, reference)) / len(texts), 3)
+        print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import asyncio
+import json
+import time
+
+from control_channel import ControlChannel
+
+
+"""
+远程控制通道压力测试
+本地asyncio指令服务器向客户端连续灌入大量换行分隔的指令（可混入不带换行的裸指令），
+统计接收吞吐量、服务器主动断开后的重连耗时，以及重连后服务器收到的客户端帧数。
+用法：python -m benchmarks.bench_control_channel --commands 50000
+"""
+
+COMMANDS = [b"forward", b"backward", b"left", b"right", b"stop", b"sitdown", b"standup"]
+
+
+async def run(args):
+    received = []
+    echoed = []
+    connections = []
+    done = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    async def handle(reader, writer):
+        connections.append(time.monotonic())
+        if len(connections) > 1:
+            # 重连后的连接只负责统计回显
+            while data := await reader.read(65536):
+                echoed.append(data.count(b"\n"))
+            return
+        # 灌入指令，按块写出以模拟突发
+        payload = b"".join(COMMANDS[i % len(COMMANDS)] + b"\n" for i in range(args.commands))
+        for offset in range(0, len(payload), args.chunk):
+            writer.write(payload[offset:offset + args.chunk])
+            await writer.drain()
+        await asyncio.sleep(0.5)
+        writer.close()  # 主动断开，触发客户端重连
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    def on_message(message):
+        received.append(message)
+        if len(received) == args.commands:
+            loop.call_soon_threadsafe(done.set)
+
+    channel = ControlChannel("127.0.0.1", port, on_message, known_commands=[c.decode() for c in COMMANDS],
+                             heartbeat=b'{"type": "heartbeat"}\n', heartbeat_interval=0.2, backoff_base=0.05)
+    begin = time.monotonic()
+    channel.start()
+    await asyncio.wait_for(done.wait(), 60)
+    elapsed = time.monotonic() - begin
+
+    # 服务器断开前排队发送状态帧
+    sent = sum(channel.send(b'{"type": "state"}\n') for _ in range(args.sends))
+
+    while len(connections) < 2 and time.monotonic() - begin < 60:
+        await asyncio.sleep(0.01)
+    for _ in range(args.sends):
+        channel.send(b'{"type": "state"}\n')
+    await asyncio.sleep(0.5)
+    channel.stop()
+    await asyncio.sleep(0.2)
+    server.close()
+
+    return {
+        "commands": args.commands,
+        "received": len(received),
+        "commands_per_s": round(len(received) / elapsed, 1),
+        "queued_sends": sent,
+        "reconnected": len(connections) > 1,
+        "reconnect_s": round(connections[1] - connections[0], 3) if len(connections) > 1 else None,
+        "frames_after_reconnect": sum(echoed),  # 状态帧及心跳帧
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="远程控制通道吞吐量与重连测试")
+    parser.add_argument("--commands", type=int, default=50000)
+    parser.add_argument("--chunk", type=int, default=4096, help="服务器每次写出的字节数")
+    parser.add_argument("--sends", type=int, default=1000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+import numpy as np
+import threading
+import argparse
+import queue
+import glob
+import json
+import time
+import wave
+import os
+
+from benchmarks.fakes import FakeSportClient, PlaybackSink, MockLLMServer, DiscardServer, install_robot_fakes
+
+
+"""
+端到端语音时延基准测试
+用替身替换机器狗SDK、声卡和大模型服务器后运行synthesis_client的完整流程（识别及合成使用Processor中配置的真实模型）：
+    录音：把wav夹具按块送入AudioRecorder.audio_callback，两句之间补低幅噪声，可按speed倍速回放
+    运动：FakeSportClient记录每次调用
+    大模型：本地MockLLMServer按设定的首包延迟及逐片延迟流式返回固定回答
+    播放：PlaybackSink按实时速度消耗音频
+每个wav为一句话（末尾不留长静音），以wav结束时刻为说话结束时刻，统计各阶段时延（毫秒）：
+    endpoint 说话结束→端点检测提交任务    queue 提交→开始识别    asr 识别耗时
+    llm_first_chunk 识别完成→收到大模型首个片段    first_audio 说话结束→首段语音交给播放器
+    command 说话结束→首个运动控制调用（指令类语句）
+sequential模式逐句等待处理完再送下一句；burst模式连续送入全部语句，另统计吞吐量。
+输出一行JSON，可在版本之间直接比较。
+用法：python -m benchmarks.bench_e2e fixtures/e2e --mode sequential --repeat 3
+      python -m benchmarks.bench_e2e fixtures/e2e --mode burst --gap 0.3 --workers 2
+"""
+
+STAGES = ["endpoint", "queue", "asr", "llm_first_chunk", "first_audio", "command"]
+ANSWER = "好的，我是宇树机器狗。很高兴认识你！有什么可以帮你的吗？"
+
+
+def load_wav(wav_path):
+    with wave.open(wav_path, "rb") as f:
+        if f.getnchannels() != 1 or f.getsampwidth() != 2:
+            raise ValueError(f"{wav_path}: 需要单声道int16 wav")
+        return np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16), f.getframerate()
+
+
+class Feeder:
+    """按实时速度（乘以speed）向录音回调送入音频，没有待送语句时送入低幅噪声"""
+    def __init__(self, recorder, sample_rate, block_size, speed):
+        self.recorder = recorder
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.speed = speed
+        self.utterances = queue.Queue()
+        self.speech_ends = []  # 每句话最后一个采样送入的时刻
+        self.rng = np.random.default_rng(0)
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def play(self, audio, gap=0.0):
+        """排队一句话，之后紧跟gap秒噪声"""
+        self.utterances.put((audio, gap))
+
+    def _blocks(self):
+        while True:
+            try:
+                audio, gap = self.utterances.get_nowait()
+            except queue.Empty:
+                yield self._noise(self.block_size), False
+                continue
+            for offset in range(0, len(audio), self.block_size):
+                block = audio[offset:offset + self.block_size]
+                yield block, offset + len(block) >= len(audio)
+            remaining = int(gap * self.sample_rate)
+            while remaining > 0:
+                size = min(self.block_size, remaining)
+                yield self._noise(size), False
+                remaining -= size
+
+    def _noise(self, size):
+        return self.rng.normal(0, 30, size).astype(np.int16)
+
+    def _run(self):
+        begin = time.monotonic()
+        fed = 0
+        for block, utterance_end in self._blocks():
+            # 按送入的采样数定时，保持稳定的回放速度
+            delay = begin + fed / self.sample_rate / self.speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self.recorder.audio_callback(block.reshape(-1, 1), len(block), None, None)
+            fed += len(block)
+            if utterance_end:
+                self.speech_ends.append(time.monotonic())
+
+
+class Tracer:
+    """包装流程中的各个环节，按任务记录各阶段时刻"""
+    def __init__(self, app, sport_client, llm_server):
+        self.app = app
+        self.sport_client = sport_client
+        self.llm_server = llm_server
+        self.records = []  # 按提交顺序，与送入的语句一一对应
+        self.by_seq = {}
+        self.local = threading.local()
+        self._lock = threading.Lock()
+
+        scheduler = app.scheduler
+        submit = scheduler.submit
+        process_utterance = app.process_utterance
+        batcher = app.stt_batcher
+        player_write = app.audio_player.write
+
+        def traced_submit(target, *args):
+            job = submit(target, *args)
+            with self._lock:
+                record = {"submit": time.monotonic()}
+                self.records.append(record)
+                self.by_seq[job.seq] = record
+            return job
+
+        def traced_process(job, *args):
+            self.local.record = self.by_seq.get(job.seq)
+            if self.local.record is not None:
+                self.local.record["start"] = time.monotonic()
+            return process_utterance(job, *args)
+
+        class TracedBatcher:
+            def process(_, audio, sample_rate=16000):
+                text = batcher.process(audio, sample_rate)
+                record = getattr(self.local, "record", None)
+                if record is not None:
+                    record["asr"] = time.monotonic()
+                    record["text"] = text
+                return text
+
+        def traced_write(pcm):
+            record = getattr(self.local, "record", None)
+            if record is not None and "first_audio" not in record:
+                record["first_audio"] = time.monotonic()
+            player_write(pcm)
+
+        scheduler.submit = traced_submit
+        app.process_utterance = traced_process
+        app.stt_batcher = TracedBatcher()
+        app.audio_player.write = traced_write
+
+    def idle(self, submitted):
+        """已提交submitted个任务且全部结束、播放完毕时返回True"""
+        stats = self.app.scheduler.stats()
+        return (len(self.records) >= submitted and not stats["queued"] and not stats["running"]
+                and not self.app.audio_player.queue.unfinished_tasks)
+
+    def stage_latencies(self, speech_ends):
+        """返回{阶段: [毫秒]}"""
+        first_chunks = list(self.llm_server.first_chunks)
+        motions = [moment for moment, name, _ in self.sport_client.calls if name not in ("SetTimeout", "Init")]
+        latencies = {stage: [] for stage in STAGES}
+        for record, speech_end in zip(self.records, speech_ends):
+            if "asr" not in record:
+                continue
+            latencies["endpoint"].append(record["submit"] - speech_end)
+            latencies["queue"].append(record["start"] - record["submit"])
+            latencies["asr"].append(record["asr"] - record["start"])
+            if "first_audio" in record:
+                # 同一句话可能重复出现，取识别完成后该查询的第一个片段
+                chunk = next((moment for moment, query in first_chunks
+                              if query == record["text"] and moment >= record["asr"]), None)
+                if chunk is not None:
+                    latencies["llm_first_chunk"].append(chunk - record["asr"])
+                latencies["first_audio"].append(record["first_audio"] - speech_end)
+            command = next((moment for moment in motions if moment >= record["asr"]), None)
+            if command is not None and "first_audio" not in record:
+                latencies["command"].append(command - speech_end)
+        return {stage: [value * 1000 for value in values] for stage, values in latencies.items()}
+
+
+def summarize(values):
+    if not values:
+        return {"count": 0}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"count": len(values), "mean": round(float(np.mean(values)), 1),
+            "p50": round(float(p50), 1), "p95": round(float(p95), 1), "p99": round(float(p99), 1)}
+
+
+def wait_until(condition, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端语音时延基准测试")
+    parser.add_argument("fixtures", help="wav文件目录，每个文件一句话")
+    parser.add_argument("--mode", choices=["sequential", "burst"], default="sequential")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--speed", type=float, default=1.0, help="录音回放及播放倍速")
+    parser.add_argument("--gap", type=float, default=0.3, help="burst模式下句间噪声时长/s")
+    parser.add_argument("--tail", type=float, default=1.5, help="sequential模式下句末补充的噪声时长/s")
+    parser.add_argument("--workers", type=int, default=1, help="语音处理工作线程数")
+    parser.add_argument("--queue-size", type=int, default=8, help="最多排队的语音段数")
+    parser.add_argument("--answer", default=ANSWER)
+    parser.add_argument("--first-token-delay", type=float, default=0.3, help="大模型首个片段延迟/s")
+    parser.add_argument("--token-delay", type=float, default=0.05, help="大模型片段间隔/s")
+    parser.add_argument("--cache", action="store_true", help="保留回答缓存及短语缓存")
+    parser.add_argument("--timeout", type=float, default=60, help="等待单句处理完成的上限/s")
+    parser.add_argument("--details", action="store_true", help="额外逐句输出各阶段时刻")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.fixtures, "*.wav")))
+    if not paths:
+        parser.error("夹具目录中没有wav文件")
+    fixtures = [load_wav(path) for path in paths]
+    sample_rate = fixtures[0][1]
+    if any(rate != sample_rate for _, rate in fixtures):
+        parser.error("夹具采样率必须一致")
+
+    sport_client = FakeSportClient()
+    install_robot_fakes(sample_rate, PlaybackSink(args.speed), sport_client)
+    llm_server = MockLLMServer(args.answer, token_delay=args.token_delay, first_delay=args.first_token_delay)
+    control_server = DiscardServer()
+
+    import synthesis_client as app
+    app.llm_url_root = llm_server.url
+    app.SERVER_IP = "127.0.0.1"
+    app.SERVER_PORT = control_server.port
+    app.Job_Workers = args.workers
+    app.Job_Queue_Size = args.queue_size
+    app.Archive_Recordings = False
+    app.Archive_Replies = False
+    load_begin = time.monotonic()
+    app.startup.wait()
+    load_time = time.monotonic() - load_begin
+    app.start()
+    if not args.cache:
+        app.llm_client.cache.max_entries = 0
+        app.tts_generator.cache = None
+
+    tracer = Tracer(app, sport_client, llm_server)
+    feeder = Feeder(app.recorder, sample_rate, app.BlockSize, args.speed)
+    utterances = [audio for _ in range(args.repeat) for audio, _ in fixtures]
+    begin = time.monotonic()
+    if args.mode == "sequential":
+        for i, audio in enumerate(utterances):
+            feeder.play(audio, args.tail)
+            if not wait_until(lambda: tracer.idle(i + 1), args.timeout / args.speed + len(audio) / sample_rate):
+                print(f"第{i + 1}句未在时限内处理完成")
+    else:
+        for audio in utterances:
+            feeder.play(audio, args.gap)
+        total = sum(len(audio) for audio in utterances) / sample_rate + args.gap * len(utterances)
+        wait_until(lambda: tracer.idle(len(utterances)), total / args.speed + args.timeout)
+    elapsed = time.monotonic() - begin
+
+    latencies = tracer.stage_latencies(feeder.speech_ends)
+    if args.details:
+        for record, speech_end in zip(tracer.records, feeder.speech_ends):
+            print(json.dumps({key: round((value - speech_end) * 1000, 1) if isinstance(value, float) else value
+                              for key, value in record.items()}, ensure_ascii=False))
+    stats = app.scheduler.stats()
+    print(json.dumps({
+        "mode": args.mode,
+        "speed": args.speed,
+        "workers": args.workers,
+        "utterances": len(utterances),
+        "submitted": len(tracer.records),
+        "completed": stats.get("done", 0),
+        "dropped": stats.get("dropped", 0),
+        "cancelled": stats.get("cancelled", 0),
+        "load_s": round(load_time, 2),
+        "elapsed_s": round(elapsed, 2),
+        "throughput_per_s": round(stats.get("done", 0) / elapsed, 3),
+        "stages_ms": {stage: summarize(latencies[stage]) for stage in STAGES},
+    }, ensure_ascii=False))
+    os._exit(0)  # 各组件线程均为常驻线程，直接退出
+
+
+if __name__ == "__main__":
+    main()
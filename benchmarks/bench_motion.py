@@ -0,0 +1,65 @@
+import numpy as np
+import argparse
+import json
+import time
+
+from benchmarks.fakes import FakeSportClient
+from motion import MotionExecutor, velocity, call
+
+
+"""
+运动执行器基准
+使用记录调用时间戳的FakeSportClient，统计Move实际下发频率与间隔抖动、提交调用的返回耗时，
+以及新指令/停止指令抢占正在执行动作的延迟。
+用法：python -m benchmarks.bench_motion --rate 50
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="运动执行器下发频率与抢占延迟")
+    parser.add_argument("--rate", type=float, default=20)
+    parser.add_argument("--duration", type=float, default=2.0)
+    args = parser.parse_args()
+
+    client = FakeSportClient()
+    executor = MotionExecutor(client, args.rate)
+
+    begin = time.perf_counter()
+    executor.submit([velocity(0.5, 0, 0, args.duration)])
+    submit_us = (time.perf_counter() - begin) * 1e6
+    time.sleep(args.duration + 0.2)
+    ticks = np.array([t for t, _, _ in client.calls_to("Move")])
+    intervals = np.diff(ticks) * 1000
+
+    # 抢占：在长时间前进过程中提交停止指令
+    executor.submit([velocity(0.5, 0, 0, 10)])
+    time.sleep(0.5)
+    stop_at = time.monotonic()
+    executor.stop()
+    time.sleep(0.2)
+    stops = [t for t, _, _ in client.calls_to("StopMove") if t >= stop_at]
+    late_moves = [t for t, _, args in client.calls_to("Move") if t > stop_at]
+
+    # 抢占：新的速度指令替换正在执行的指令
+    executor.submit([velocity(0.5, 0, 0, 10)])
+    time.sleep(0.5)
+    switch_at = time.monotonic()
+    executor.submit([velocity(0, 0, 1.0, 0.5)])
+    time.sleep(0.2)
+    switched = [t for t, _, move in client.calls_to("Move") if t >= switch_at and move == (0, 0, 1.0)]
+    executor.submit([call("StopMove")])
+
+    print(json.dumps({
+        "target_rate_hz": args.rate,
+        "achieved_rate_hz": round(len(ticks) / args.duration, 2),
+        "interval_ms_p50": round(float(np.percentile(intervals, 50)), 2),
+        "interval_ms_p99": round(float(np.percentile(intervals, 99)), 2),
+        "submit_us": round(submit_us, 1),
+        "stop_latency_ms": round((stops[0] - stop_at) * 1000, 2) if stops else None,
+        "moves_after_stop": len(late_moves),
+        "preempt_latency_ms": round((switched[0] - switch_at) * 1000, 2) if switched else None,
+    }))
+
+
+if __name__ == "__main__":
+    main()
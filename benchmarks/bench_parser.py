@@ -0,0 +1,107 @@
+import numpy as np
+import argparse
+import json
+import time
+import re
+
+import cn2an
+
+from command_parser import parse_commands
+
+
+"""
+指令解析微基准
+对识别结果语料逐条解析，输出吞吐量与单条解析延迟分位数，并与原有的逐次编译正则+逐字切分方式对比。
+语料文件每行一条识别结果，未指定时使用内置样例。
+用法：python -m benchmarks.bench_parser --corpus transcripts.txt
+"""
+
+SAMPLE_CORPUS = [
+    "go to向前走两米",
+    "狗兔，向前走3米，然后左转90度。",
+    "goto后退一米",
+    "右转一百三十五度",
+    "站起来",
+    "go two坐下",
+    "上调默认速度",
+    "减小默认距离",
+    "向前走五米，右转四十五度，再向前走两米，左转一百八十度。",
+    "今天天气怎么样",
+    "你叫什么名字",
+    "给我讲一个笑话吧",
+]
+
+# 解析结果回归用例：识别结果 -> [(动作, 方向)]
+EXPECTED = {
+    "狗兔，向前走3米，然后左转90度。": [("move", 1), ("turn", 1)],
+    "往前": [("move", 1)],
+    "向后": [("move", -1)],
+    "往后一点": [("move", -1)],
+    "后退一米": [("move", -1)],
+    "以后再说吧": [],
+    "前面有什么": [],
+    "今天雨停了吗": [],
+    "停止前进": [("stop", 0)],
+}
+
+
+def legacy_parse(text):
+    """原有实现：每次调用重新编译正则，逐字切分子句"""
+    move_pattern = re.compile(r'([前后])走?(\d+|[零一二三四五六七八九十百]+)?米?')
+    turn_pattern = re.compile(r'([左右])转?(\d+|[零一二三四五六七八九十百]+)?度?')
+    clauses, current = [], []
+    for char in text:
+        if char in '，。':
+            if current:
+                clauses.append(''.join(current))
+                current = []
+        else:
+            current.append(char)
+    if current:
+        clauses.append(''.join(current))
+    commands = []
+    for clause in clauses:
+        if match := move_pattern.search(clause):
+            commands.append(("move", cn2an.cn2an(match.group(2), "smart") if match.group(2) else None))
+        elif match := turn_pattern.search(clause):
+            commands.append(("turn", cn2an.cn2an(match.group(2), "smart") if match.group(2) else None))
+    return commands
+
+
+def measure(parse, corpus, repeat):
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in corpus:
+            begin = time.perf_counter_ns()
+            parse(text)
+            latencies.append(time.perf_counter_ns() - begin)
+    elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) / 1000
+    return {
+        "parses_per_s": round(len(latencies) / elapsed, 1),
+        "latency_us_p50": round(float(np.percentile(latencies, 50)), 2),
+        "latency_us_p99": round(float(np.percentile(latencies, 99)), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="指令解析吞吐量与延迟基准")
+    parser.add_argument("--corpus", help="识别结果语料文件，每行一条")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    corpus = SAMPLE_CORPUS
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8") as f:
+            corpus = [line.strip() for line in f if line.strip()]
+
+    results = {text: [(c.action, c.direction) for c in parse_commands(text)] for text in EXPECTED}
+    failed = {text: plan for text, plan in results.items() if plan != EXPECTED[text]}
+    print(json.dumps({"regression_cases": len(EXPECTED), "failed": failed}, ensure_ascii=False))
+    for name, parse in (("grammar", parse_commands), ("legacy", legacy_parse)):
+        print(json.dumps({"parser": name, "transcripts": len(corpus), **measure(parse, corpus, args.repeat)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+from resampler import StreamingResampler
+
+
+"""
+录音重采样基准测试
+以设备常见采样率（48k、44.1k）生成测试信号，按音频回调的块大小流式重采样到16k，输出：
+    通带：各频率正弦的增益（dB）及信噪比（dB），反映语音频段是否失真
+    混叠：高于目标奈奎斯特频率的正弦折叠进输出的残留电平（dB，越低越好）
+    耗时：每秒音频的重采样CPU耗时（毫秒），已安装scipy时同时给出resample_poly的整段耗时作对照
+    分块一致性：分块结果与整段处理结果的最大差值
+    下游数据量：重采样后的采样数占原始采样数的比例
+用法：python -m benchmarks.bench_resample --rates 48000 44100 --blocks 256 1024 4096
+"""
+
+PASSBAND = [100, 300, 1000, 3000, 5000, 6500]
+STOPBAND = [9000, 12000, 15000, 20000]
+
+
+def tone(freq, rate, seconds, amplitude=0.5):
+    t = np.arange(int(rate * seconds)) / rate
+    return (amplitude * 32767 * np.sin(2 * np.pi * freq * t)).astype(np.int16)
+
+
+def run_stream(resampler, audio, block_size):
+    blocks = [resampler.process(audio[offset:offset + block_size]) for offset in range(0, len(audio), block_size)]
+    return np.concatenate(blocks)
+
+
+def fit_tone(output, freq, rate):
+    """最小二乘拟合该频率的正弦分量，返回(幅度, 残差均方根)"""
+    t = np.arange(len(output)) / rate
+    basis = np.stack([np.sin(2 * np.pi * freq * t), np.cos(2 * np.pi * freq * t)], axis=1)
+    coeffs, *_ = np.linalg.lstsq(basis, output, rcond=None)
+    residual = output - basis @ coeffs
+    return float(np.hypot(*coeffs)), float(np.sqrt(np.mean(residual ** 2)))
+
+
+def quality(in_rate, out_rate, block_size):
+    amplitude = 0.5 * 32767
+    skip = out_rate // 10  # 跳过滤波器起始的瞬态
+    passband = {}
+    for freq in PASSBAND:
+        output = run_stream(StreamingResampler(in_rate, out_rate), tone(freq, in_rate, 1.0), block_size)
+        output = output[skip:].astype(np.float64)
+        gain, noise = fit_tone(output, freq, out_rate)
+        passband[freq] = {"gain_db": round(20 * np.log10(gain / amplitude), 2),
+                          "snr_db": round(20 * np.log10(gain / max(noise, 1e-9)), 1)}
+    aliasing = {}
+    for freq in STOPBAND:
+        if freq >= in_rate / 2:
+            continue
+        output = run_stream(StreamingResampler(in_rate, out_rate), tone(freq, in_rate, 1.0), block_size)
+        rms = np.sqrt(np.mean(output[skip:].astype(np.float64) ** 2))
+        aliasing[freq] = round(20 * np.log10(max(rms * np.sqrt(2), 1e-3) / amplitude), 1)
+    return passband, aliasing
+
+
+def cpu_cost(in_rate, out_rate, block_size, seconds):
+    audio = np.random.default_rng(0).normal(0, 3000, int(in_rate * seconds)).astype(np.int16)
+    resampler = StreamingResampler(in_rate, out_rate)
+    begin = time.perf_counter()
+    run_stream(resampler, audio, block_size)
+    return (time.perf_counter() - begin) / seconds * 1000
+
+
+def scipy_cost(in_rate, out_rate, seconds):
+    try:
+        from scipy.signal import resample_poly
+    except ImportError:
+        return None
+    resampler = StreamingResampler(in_rate, out_rate)
+    audio = np.random.default_rng(0).normal(0, 3000, int(in_rate * seconds)).astype(np.float32)
+    begin = time.perf_counter()
+    resample_poly(audio, resampler.up, resampler.down)
+    return (time.perf_counter() - begin) / seconds * 1000
+
+
+def consistency(in_rate, out_rate, block_size):
+    audio = np.random.default_rng(1).normal(0, 3000, in_rate).astype(np.float32)
+    whole = StreamingResampler(in_rate, out_rate).process(audio)
+    chunked = run_stream(StreamingResampler(in_rate, out_rate), audio, block_size)
+    if len(whole) != len(chunked):
+        return None
+    return float(np.max(np.abs(whole - chunked)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="录音重采样基准测试")
+    parser.add_argument("--rates", type=int, nargs="+", default=[48000, 44100], help="采集采样率")
+    parser.add_argument("--target", type=int, default=16000)
+    parser.add_argument("--blocks", type=int, nargs="+", default=[256, 1024, 4096], help="音频回调块大小")
+    parser.add_argument("--seconds", type=float, default=10, help="计时所用的音频时长/s")
+    args = parser.parse_args()
+
+    for rate in args.rates:
+        resampler = StreamingResampler(rate, args.target)
+        passband, aliasing = quality(rate, args.target, args.blocks[0])
+        result = {
+            "in_rate": rate,
+            "out_rate": args.target,
+            "ratio": f"{resampler.up}/{resampler.down}",
+            "taps": resampler.taps,
+            "sample_ratio": round(resampler.up / resampler.down, 4),
+            "passband": passband,
+            "aliasing_db": aliasing,
+            "cpu_ms_per_s": {block: round(cpu_cost(rate, args.target, block, args.seconds), 2)
+                             for block in args.blocks},
+            "chunked_max_diff": {block: consistency(rate, args.target, block) for block in args.blocks},
+        }
+        reference = scipy_cost(rate, args.target, args.seconds)
+        if reference is not None:
+            result["scipy_resample_poly_ms_per_s"] = round(reference, 2)
+        print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import argparse
+import json
+import time
+
+import torch
+
+from tts_backend import load_kokoro, synthesize
+
+
+"""
+语音合成实时率基准测试
+对同一组中文句子依次用各配置（精度:线程数）加载Kokoro并合成，
+输出实时率（合成耗时/生成音频时长，越小越快）、首段延迟中位数及加载耗时。
+用法：python -m benchmarks.bench_tts --model ckpts/kokoro-v1.1/kokoro-v1_1-zh.pth --config ckpts/kokoro-v1.1/config.json
+      --voice ckpts/kokoro-v1.1/voices/zm_014.pt --configs fp32:4 int8:4
+"""
+
+SAMPLE_RATE = 24000
+CORPUS = [
+    "你好，我是机器狗。",
+    "服务暂时不可用，请稍后再试。",
+    "好的，现在向前走两米。",
+    "当前电量百分之七十五，主板温度四十二度。",
+    "今天天气晴朗，气温二十三度，适合户外活动。",
+    "我可以帮你巡逻、跟随，或者回答一些简单的问题。",
+    "请注意，前方有障碍物，我将停止前进。",
+    "语音识别完成之后，大模型会根据你的问题生成回答，再由我读出来。",
+]
+
+
+def run_config(precision, threads, sentences, args):
+    begin = time.perf_counter()
+    _, pipeline, device = load_kokoro(args.repo_id, args.model, args.config, args.device, precision, threads)
+    voice = torch.load(args.voice, weights_only=True)
+    load_time = time.perf_counter() - begin
+
+    # 预热一次，不计入耗时
+    for _ in synthesize(pipeline, sentences[0], voice, args.speed):
+        pass
+    elapsed = 0
+    samples = 0
+    first_latencies = []
+    for _ in range(args.repeat):
+        for sentence in sentences:
+            begin = time.perf_counter()
+            first = None
+            for pcm in synthesize(pipeline, sentence, voice, args.speed):
+                if first is None:
+                    first = time.perf_counter() - begin
+                samples += len(pcm)
+            elapsed += time.perf_counter() - begin
+            if first is not None:
+                first_latencies.append(first)
+    first_latencies.sort()
+    return {
+        "precision": precision,
+        "threads": threads,
+        "device": device,
+        "load_s": round(load_time, 2),
+        "audio_s": round(samples / SAMPLE_RATE, 1),
+        "rtf": round(elapsed / (samples / SAMPLE_RATE), 4),
+        "first_chunk_p50_ms": round(first_latencies[len(first_latencies) // 2] * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="语音合成实时率基准测试")
+    parser.add_argument("--repo-id", default="hexgrad/Kokoro-82M-v1.1-zh")
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--config", required=True)
+    parser.add_argument("--voice", required=True)
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--speed", type=float, default=1.1)
+    parser.add_argument("--corpus", help="每行一句的UTF-8文本文件，缺省使用内置句子")
+    parser.add_argument("--configs", nargs="+", default=["fp32:4", "int8:4"], help="精度:线程数")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    sentences = CORPUS
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8") as f:
+            sentences = [line.strip() for line in f if line.strip()]
+    for config in args.configs:
+        precision, _, threads = config.partition(":")
+        result = run_config(precision, int(threads) if threads else None, sentences, args)
+        print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
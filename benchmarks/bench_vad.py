@@ -0,0 +1,113 @@
+import numpy as np
+import argparse
+import json
+import wave
+import os
+
+from vad import ThresholdDetector, AdaptiveDetector, FsmnDetector, START, END
+
+
+"""
+端点检测基准测试
+夹具目录中每个单声道int16 wav文件配一个同名json标注文件：
+    {"segments": [[开始秒, 结束秒], ...]}    纯噪声文件segments为空
+按块送入检测器，统计误触发率（与任何标注语音段都不重叠的起点，按每分钟计）、漏检数，
+以及端点延迟（标注语音结束到检测器发出终点事件时已送入的音频时长）。
+用法：python -m benchmarks.bench_vad fixtures/vad --detector adaptive threshold
+"""
+
+
+def load_fixture(wav_path):
+    with wave.open(wav_path, "rb") as f:
+        if f.getnchannels() != 1 or f.getsampwidth() != 2:
+            raise ValueError(f"{wav_path}: 需要单声道int16 wav")
+        sample_rate = f.getframerate()
+        audio = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+    with open(os.path.splitext(wav_path)[0] + ".json", encoding="utf-8") as f:
+        segments = [(int(beg * sample_rate), int(end * sample_rate)) for beg, end in json.load(f)["segments"]]
+    return audio, sample_rate, segments
+
+
+def make_detector(kind, sample_rate, args):
+    if kind == "threshold":
+        return ThresholdDetector(sample_rate)
+    if kind == "fsmn":
+        from funasr import AutoModel
+        model = AutoModel(model=args.vad_model, disable_update=True, disable_pbar=True, log_level="ERROR")
+        return FsmnDetector(model, sample_rate)
+    return AdaptiveDetector(sample_rate)
+
+
+def run_file(detector, audio, block_size):
+    """返回检测到的语音段列表[(起点, 终点, 终点事件发出时的采样位置)]"""
+    detected = []
+    start = None
+    for offset in range(0, len(audio), block_size):
+        block = audio[offset:offset + block_size]
+        emitted_at = offset + len(block)
+        for event, index in detector.process(block):
+            if event == START:
+                start = index
+            elif event == END and start is not None:
+                detected.append((start, index, emitted_at))
+                start = None
+    if start is not None:
+        detected.append((start, len(audio), None))
+    return detected
+
+
+def evaluate(kind, fixtures, args):
+    false_triggers = 0
+    missed = 0
+    labelled = 0
+    total_samples = 0
+    latencies = []
+    for wav_path in fixtures:
+        audio, sample_rate, segments = load_fixture(wav_path)
+        total_samples += len(audio) / sample_rate
+        detected = run_file(make_detector(kind, sample_rate, args), audio, args.block_size)
+        labelled += len(segments)
+
+        for beg, end, _ in detected:
+            if not any(beg < seg_end and end > seg_beg for seg_beg, seg_end in segments):
+                false_triggers += 1
+        for seg_beg, seg_end in segments:
+            hits = [d for d in detected if d[0] < seg_end and d[1] > seg_beg]
+            if not hits:
+                missed += 1
+                continue
+            # 以覆盖该段末尾的检测段的终点事件计算延迟
+            emitted = max(hits, key=lambda d: d[1])[2]
+            if emitted is not None:
+                latencies.append((emitted - seg_end) / sample_rate * 1000)
+
+    minutes = total_samples / 60
+    return {
+        "detector": kind,
+        "files": len(fixtures),
+        "audio_minutes": round(minutes, 2),
+        "labelled_segments": labelled,
+        "missed": missed,
+        "false_triggers": false_triggers,
+        "false_triggers_per_min": round(false_triggers / minutes, 3) if minutes else 0.0,
+        "endpoint_latency_ms_p50": round(float(np.percentile(latencies, 50)), 1) if latencies else None,
+        "endpoint_latency_ms_p95": round(float(np.percentile(latencies, 95)), 1) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="端点检测误触发率与端点延迟基准")
+    parser.add_argument("fixtures", help="标注wav夹具目录")
+    parser.add_argument("--detector", nargs="+", default=["adaptive", "threshold"],
+                        choices=["adaptive", "threshold", "fsmn"])
+    parser.add_argument("--block-size", type=int, default=1024)
+    parser.add_argument("--vad-model", default="***/fsmn_vad", help="fsmn检测器使用的模型路径")
+    args = parser.parse_args()
+
+    fixtures = sorted(os.path.join(args.fixtures, name) for name in os.listdir(args.fixtures) if name.endswith(".wav"))
+    for kind in args.detector:
+        print(json.dumps(evaluate(kind, fixtures, args), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
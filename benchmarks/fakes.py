@@ -0,0 +1,191 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import socketserver
+import threading
+import types
+import json
+import time
+import sys
+
+
+"""
+基准测试用的替身对象
+"""
+
+
+class FakeSportClient:
+    """记录每次调用时间戳与参数的SportClient替身，calls为[(time.monotonic(), 方法名, 参数)]"""
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def record(*args):
+            with self._lock:
+                self.calls.append((time.monotonic(), name, args))
+            return 0
+        return record
+
+    def calls_to(self, name):
+        with self._lock:
+            return [call for call in self.calls if call[1] == name]
+
+
+class PlaybackSink:
+    """播放设备替身：按speed倍实时速度消耗写入的音频，writes为[(time.monotonic(), 帧数)]"""
+    def __init__(self, speed=1.0):
+        self.speed = speed
+        self.writes = []
+        self._lock = threading.Lock()
+
+    def stream(self, samplerate, channels=1, dtype="float32", **kwargs):
+        return _SinkStream(self, samplerate)
+
+
+class _SinkStream:
+    def __init__(self, sink, samplerate):
+        self.sink = sink
+        self.samplerate = samplerate
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def close(self):
+        pass
+
+    def write(self, data):
+        with self.sink._lock:
+            self.sink.writes.append((time.monotonic(), len(data)))
+        time.sleep(len(data) / self.samplerate / self.sink.speed)
+
+
+class FakeInputStream:
+    """录音流替身：不产生数据，由基准测试直接调用回调送入音频"""
+    def __init__(self, callback=None, **kwargs):
+        self.callback = callback
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeSubscriber:
+    def __init__(self, topic, message_type):
+        self.topic = topic
+
+    def Init(self, handler=None, queue_len=0):
+        pass
+
+
+def install_robot_fakes(sample_rate, sink, sport_client):
+    """以替身模块替换sounddevice、playsound及unitree_sdk2py，须在导入Processor之前调用"""
+    def query_devices(device=None, kind=None):
+        info = {"name": "fake", "default_samplerate": sample_rate}
+        return [info] if device is None else info
+
+    def check_input_settings(device=None, samplerate=None, **kwargs):
+        # 只支持夹具的采样率，其他采样率由录音端重采样
+        if samplerate is not None and samplerate != sample_rate:
+            raise ValueError(f"unsupported sample rate: {samplerate}")
+
+    modules = {
+        "sounddevice": {"query_devices": query_devices, "check_input_settings": check_input_settings,
+                        "InputStream": FakeInputStream, "OutputStream": sink.stream},
+        "playsound": {"playsound": lambda *args, **kwargs: None},
+        "unitree_sdk2py": {},
+        "unitree_sdk2py.core": {},
+        "unitree_sdk2py.core.channel": {"ChannelFactoryInitialize": lambda *args: None,
+                                        "ChannelSubscriber": FakeSubscriber},
+        "unitree_sdk2py.go2": {},
+        "unitree_sdk2py.go2.sport": {},
+        "unitree_sdk2py.go2.sport.sport_client": {"SportClient": lambda: sport_client},
+        "unitree_sdk2py.idl": {},
+        "unitree_sdk2py.idl.unitree_go": {},
+        "unitree_sdk2py.idl.unitree_go.msg": {},
+        "unitree_sdk2py.idl.unitree_go.msg.dds_": {"LowState_": object},
+    }
+    for name, attributes in modules.items():
+        module = types.ModuleType(name)
+        module.__dict__.update(attributes)
+        sys.modules[name] = module
+
+
+class MockLLMServer:
+    """本地大模型接口替身：以分块传输逐行返回{"answer": 片段}，最后返回metadata行
+
+    requests为[(time.monotonic(), 查询文本)]，first_chunks为[(time.monotonic(), 查询文本)]
+    """
+    def __init__(self, answer, token_chars=2, token_delay=0.05, first_delay=0.3):
+        self.tokens = [answer[i:i + token_chars] for i in range(0, len(answer), token_chars)]
+        self.token_delay = token_delay
+        self.first_delay = first_delay
+        self.requests = []
+        self.first_chunks = []
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                query = body.get("query", "")
+                mock.requests.append((time.monotonic(), query))
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                try:
+                    time.sleep(mock.first_delay)
+                    for i, token in enumerate(mock.tokens):
+                        if i == 0:
+                            mock.first_chunks.append((time.monotonic(), query))
+                        self._chunk(json.dumps({"answer": token}, ensure_ascii=False).encode("utf-8") + b"\n")
+                        time.sleep(mock.token_delay)
+                    self._chunk(b'{"metadata": {}}\n')
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    # 客户端取消请求时主动断开
+                    pass
+
+            def _chunk(self, data):
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+
+
+class DiscardServer:
+    """接受连接并丢弃收到的全部数据的TCP服务器，充当远程控制服务器"""
+    def __init__(self):
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                while self.request.recv(65536):
+                    pass
+
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
@@ -0,0 +1,64 @@
+from collections import namedtuple
+from functools import lru_cache
+import cn2an
+import re
+
+
+"""
+语音指令解析
+整套指令语法预编译为一个正则，对识别结果单次扫描得到按出现顺序排列的指令计划，
+交互模式取第一条指令执行，规划模式依次执行全部指令。
+"""
+
+# action: move / turn / stand / sit / stop / setting
+# move: direction 1前 -1后，amount为距离(米)；turn: direction 1左 -1右，amount为角度(度)
+# setting: direction 1上调 -1下调，target为 "速度" / "距离"；未说明数值时amount为None
+Command = namedtuple("Command", ["action", "direction", "amount", "target"], defaults=[0, None, None])
+
+NUMBER = r'(?:\d+|[零一二两三四五六七八九十百]+)'
+# 前/后紧跟在向/往之后，或后面跟走、退、进、数字时才是移动（排除前面、以后等），然后/以后/之后等作为连接词整体跳过，
+# 避免其中的“后”被当作后退；单独的“停”只在子句末尾才是停止指令（排除“雨停了吗”等闲聊）
+GRAMMAR = re.compile(
+    r'(?P<separator>[然以之]后|[以之]前)'
+    rf'|(?:[向往](?P<move>[前后])|(?P<bare_move>[前后])(?=[走退进]|{NUMBER}))[走退进]?(?P<distance>{NUMBER})?米?'
+    rf'|(?P<turn>[左右])转?(?P<angle>{NUMBER})?度?'
+    r'|(?P<stand>站起)'
+    r'|(?P<sit>坐下)'
+    r'|(?P<stop>(?:停下|停止)(?:前进|后退|移动)?|别动|停(?=[，。！？,.!?\s]|$))'
+    r'|(?P<setting>上调|增大|减小|下调)默认(?P<target>速度|距离)'
+)
+
+
+@lru_cache(maxsize=256)
+def to_number(text):
+    """将阿拉伯数字或中文数字转换为数值，text为空时返回None；口令中的数字种类有限，结果缓存复用"""
+    if not text:
+        return None
+    if text.isdigit():
+        return int(text)
+    return cn2an.cn2an(text, "smart")
+
+
+def parse_commands(text):
+    """单次扫描识别结果，返回按出现顺序排列的指令列表"""
+    commands = []
+    for match in GRAMMAR.finditer(text):
+        if match.group("separator"):
+            continue
+        move = match.group("move") or match.group("bare_move")
+        if move:
+            direction = 1 if move == "前" else -1
+            commands.append(Command("move", direction, to_number(match.group("distance"))))
+        elif match.group("turn"):
+            direction = 1 if match.group("turn") == "左" else -1
+            commands.append(Command("turn", direction, to_number(match.group("angle"))))
+        elif match.group("stand"):
+            commands.append(Command("stand"))
+        elif match.group("sit"):
+            commands.append(Command("sit"))
+        elif match.group("stop"):
+            commands.append(Command("stop"))
+        else:
+            direction = 1 if match.group("setting") in ("上调", "增大") else -1
+            commands.append(Command("setting", direction, target=match.group("target")))
+    return commands
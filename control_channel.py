@@ -0,0 +1,180 @@
+import threading
+import asyncio
+import random
+import socket
+import time
+
+
+"""
+远程控制通道
+单独线程中运行asyncio事件循环，收发在同一循环中并发进行：
+    接收：bytearray缓冲 + memoryview按换行分帧，每次读取后只整体移除一次已处理数据
+    发送：线程安全的send()将数据放入有界队列，由发送协程写出
+    心跳：定期发送心跳帧，配合TCP keepalive及可选的接收空闲超时识别失效连接
+    重连：指数退避加随机抖动
+"""
+
+
+class ControlChannel:
+    def __init__(self, host, port, on_message, known_commands=(), heartbeat=None,
+                 heartbeat_interval=5, idle_timeout=None, backoff_base=0.5, backoff_max=30,
+                 connect_timeout=10, max_pending=1000):
+        self.host = host
+        self.port = port
+        self.on_message = on_message  # 在事件循环线程中以解码后的单条消息调用
+        self.known_commands = set(known_commands)  # 服务器未加换行时按完整指令识别
+        self.heartbeat = heartbeat  # 心跳帧(bytes)，为None时不发送
+        self.heartbeat_interval = heartbeat_interval
+        self.idle_timeout = idle_timeout  # 超过该时长未收到任何数据视为连接失效，None为不检测
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.connect_timeout = connect_timeout
+        self.max_pending = max_pending
+
+        self.connected = False
+        self.running = False
+        self.loop = None
+        self.send_queue = None
+        self.last_receive = 0
+        self.reconnects = 0
+        self._thread = None
+
+    def start(self):
+        """在后台线程中启动事件循环，立即返回"""
+        self.running = True
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._main()), name="control-channel", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.loop:
+            self.loop.call_soon_threadsafe(self._wake)
+
+    def send(self, data):
+        """线程安全地发送一帧数据，未连接或发送队列已满时返回False"""
+        if not self.connected or self.loop is None:
+            return False
+        self.loop.call_soon_threadsafe(self._enqueue, data)
+        return True
+
+    def _enqueue(self, data):
+        try:
+            self.send_queue.put_nowait(data)
+        except asyncio.QueueFull:
+            print("⚠️ 发送队列已满，丢弃数据")
+
+    def _wake(self):
+        if self.send_queue is not None:
+            self.send_queue.put_nowait(None)
+
+    def backoff(self, attempt):
+        """第attempt次重连前的等待时间：指数增长，上限backoff_max，乘以0.5~1的随机抖动"""
+        return min(self.backoff_max, self.backoff_base * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+    async def _main(self):
+        self.loop = asyncio.get_running_loop()
+        self.send_queue = asyncio.Queue(self.max_pending)
+        attempt = 0
+        while self.running:
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port), self.connect_timeout)
+            except asyncio.TimeoutError:
+                print("⌛ 连接超时，重试中...")
+            except OSError as e:
+                print(f"❌ 连接失败: {str(e)}")
+            else:
+                attempt = 0
+                await self._serve(reader, writer)
+                if not self.running:
+                    break
+                self.reconnects += 1
+            delay = self.backoff(attempt)
+            attempt += 1
+            print(f"⏳ {delay:.1f}秒后尝试重新连接...")
+            await asyncio.sleep(delay)
+
+    async def _serve(self, reader, writer):
+        sock = writer.get_extra_info("socket")
+        # 设置 TCP_NODELAY 禁用 Nagle 算法，并开启TCP keepalive
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        for option, value in (("TCP_KEEPIDLE", 10), ("TCP_KEEPINTVL", 5), ("TCP_KEEPCNT", 3)):
+            if hasattr(socket, option):
+                sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+
+        # 丢弃上次连接遗留的待发送数据
+        while not self.send_queue.empty():
+            self.send_queue.get_nowait()
+        self.connected = True
+        self.last_receive = time.monotonic()
+        print("✅ 已连接云服务器")
+        tasks = [asyncio.create_task(self._receive(reader)),
+                 asyncio.create_task(self._send(writer)),
+                 asyncio.create_task(self._keepalive())]
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        self.connected = False
+        for task in pending:
+            task.cancel()
+        for task in done:
+            if task.exception():
+                print(f"⚠️ 连接中断: {task.exception()}")
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+    async def _receive(self, reader):
+        buffer = bytearray()
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                raise ConnectionError("连接中断")
+            self.last_receive = time.monotonic()
+            buffer += data
+            view = memoryview(buffer)
+            start = 0
+            try:
+                while (end := buffer.find(b'\n', start)) != -1:
+                    message = view[start:end].tobytes().decode('utf-8', errors='ignore').strip()
+                    start = end + 1
+                    if message:
+                        self._dispatch(message)
+                # 剩余部分恰好是一条完整指令时直接处理（兼容不加换行的发送方）
+                if start < len(buffer) and self.known_commands:
+                    rest = view[start:].tobytes().decode('utf-8', errors='ignore').strip()
+                    if rest in self.known_commands:
+                        start = len(buffer)
+                        self._dispatch(rest)
+            finally:
+                view.release()
+            del buffer[:start]
+
+    def _dispatch(self, message):
+        try:
+            self.on_message(message)
+        except Exception as e:
+            print(f"⚠️ 处理消息出错: {type(e).__name__} - {e}")
+
+    async def _send(self, writer):
+        while True:
+            data = await self.send_queue.get()
+            if data is None:
+                return
+            writer.write(data)
+            # 积压时合并写出后再等待缓冲区排空
+            while not self.send_queue.empty():
+                data = self.send_queue.get_nowait()
+                if data is None:
+                    return
+                writer.write(data)
+            await writer.drain()
+
+    async def _keepalive(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            if self.idle_timeout and time.monotonic() - self.last_receive > self.idle_timeout:
+                raise ConnectionError("心跳超时")
+            if self.heartbeat:
+                self._enqueue(self.heartbeat)
@@ -0,0 +1,140 @@
+import numpy as np
+import itertools
+import argparse
+import time
+import os
+
+
+"""
+飞行记录仪
+固定大小的内存映射环形日志，每条记录定长：时间戳、类型、序号、16个float32数值及一段UTF-8文本。
+追加只是对映射内存的几次赋值，不经过系统调用；进程崩溃后已写入的内容仍由操作系统落盘。
+序号最后写入，离线读取时按序号排序并丢弃未写完的记录。
+文件布局：64字节文件头（魔数、记录长度、容量），之后为capacity条记录。
+"""
+
+MAGIC = b"GO2FLT01"
+HEADER_SIZE = 64
+
+STATE = 1  # 状态采样
+MOTION = 2  # 运动控制调用，text为方法名，values为参数
+ASR = 3  # 识别结果
+REMOTE = 4  # 远程指令
+KIND_NAMES = {STATE: "state", MOTION: "motion", ASR: "asr", REMOTE: "remote"}
+
+RECORD_DTYPE = np.dtype([
+    ("time", "<f8"),
+    ("seq", "<u8"),
+    ("kind", "u1"),
+    ("count", "u1"),  # values中有效数值个数
+    ("values", "<f4", (16,)),
+    ("text", "S102"),
+])
+
+
+class FlightRecorder:
+    def __init__(self, path, capacity=200000):
+        self.path = path
+        header = np.zeros(HEADER_SIZE, dtype=np.uint8)
+        header[:8] = np.frombuffer(MAGIC, dtype=np.uint8)
+        header[8:16] = np.frombuffer(np.array([RECORD_DTYPE.itemsize, capacity], dtype="<u4").tobytes(), dtype=np.uint8)
+        size = HEADER_SIZE + RECORD_DTYPE.itemsize * capacity
+
+        existing = read_header(path) if os.path.exists(path) else None
+        if existing != (RECORD_DTYPE.itemsize, capacity) or os.path.getsize(path) != size:
+            # 新建或格式不一致时重建日志文件
+            with open(path, "wb") as f:
+                f.write(header.tobytes())
+                f.truncate(size)
+        self.capacity = capacity
+        self.records = np.memmap(path, dtype=RECORD_DTYPE, mode="r+", offset=HEADER_SIZE, shape=(capacity,))
+        # 接续已有日志的序号
+        self._seq = itertools.count(int(self.records["seq"].max()) + 1)
+
+    def append(self, kind, values=(), text=""):
+        """追加一条记录，可在多个线程中并发调用"""
+        seq = next(self._seq)
+        record = self.records[seq % self.capacity]
+        record["seq"] = 0  # 写入过程中标记为无效
+        count = min(len(values), 16)
+        record["time"] = time.time()
+        record["kind"] = kind
+        record["count"] = count
+        record["values"][:count] = values[:count]
+        record["values"][count:] = 0
+        record["text"] = text.encode("utf-8")[:RECORD_DTYPE["text"].itemsize]
+        record["seq"] = seq
+
+    def flush(self):
+        self.records.flush()
+
+
+class RecordingSportClient:
+    """透明代理SportClient，把每次调用记录到飞行记录仪后再转发"""
+    def __init__(self, client, recorder):
+        self._client = client
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+        if not callable(method):
+            return method
+
+        def call(*args):
+            self._recorder.append(MOTION, [float(a) for a in args if isinstance(a, (int, float))], name)
+            return method(*args)
+        return call
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE or header[:8] != MAGIC:
+        return None
+    record_size, capacity = np.frombuffer(header[8:16], dtype="<u4")
+    return int(record_size), int(capacity)
+
+
+def load_log(path):
+    """离线读取日志，返回按序号排序的有效记录（NumPy结构化数组）"""
+    header = read_header(path)
+    if header is None or header[0] != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path}: 不是有效的飞行记录文件")
+    records = np.fromfile(path, dtype=RECORD_DTYPE, count=header[1], offset=HEADER_SIZE)
+    records = records[records["seq"] > 0]
+    return records[np.argsort(records["seq"], kind="stable")]
+
+
+def texts(records):
+    """解码记录中的文本字段"""
+    return [raw.decode("utf-8", errors="ignore") for raw in records["text"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="飞行记录查看")
+    parser.add_argument("path")
+    parser.add_argument("--tail", type=int, default=20, help="打印最后若干条非状态记录")
+    parser.add_argument("--export", help="导出为npz文件")
+    args = parser.parse_args()
+
+    records = load_log(args.path)
+    if not len(records):
+        print("日志为空")
+        return
+    print(f"共{len(records)}条记录，"
+          f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(records['time'][0]))} ~ "
+          f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(records['time'][-1]))}")
+    for kind, name in KIND_NAMES.items():
+        print(f"{name}: {int(np.count_nonzero(records['kind'] == kind))}")
+    events = records[records["kind"] != STATE][-args.tail:]
+    for record, text in zip(events, texts(events)):
+        values = ", ".join(f"{v:g}" for v in record["values"][:record["count"]])
+        print(f"{time.strftime('%H:%M:%S', time.localtime(record['time']))}"
+              f".{int(record['time'] % 1 * 1000):03d} {KIND_NAMES.get(int(record['kind']), '?')} {text} {values}")
+    if args.export:
+        np.savez(args.export, time=records["time"], kind=records["kind"], values=records["values"],
+                 count=records["count"], text=np.array(texts(records)))
+
+
+if __name__ == "__main__":
+    main()
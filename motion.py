@@ -0,0 +1,94 @@
+from collections import deque, namedtuple
+import threading
+import time
+
+
+"""
+运动执行器
+语音/远程指令被转换为动作序列后入队即返回，由独立线程执行：
+速度指令在持续时间内以固定频率反复下发Move，新的动作序列或停止指令可立即抢占正在执行的动作。
+"""
+
+# kind: move（args为(vx, vy, vyaw)，持续duration秒）/ call（args为(方法名, *参数)）/ wait（等待duration秒）
+Motion = namedtuple("Motion", ["kind", "args", "duration"], defaults=[(), 0.0])
+
+
+def velocity(vx, vy, vyaw, duration):
+    return Motion("move", (vx, vy, vyaw), duration)
+
+
+def call(method, *args):
+    return Motion("call", (method,) + args)
+
+
+def wait(duration):
+    return Motion("wait", (), duration)
+
+
+class MotionExecutor:
+    def __init__(self, sport_client, rate=20):
+        self.client = sport_client
+        self.period = 1.0 / rate
+        self.pending = deque()
+        self.generation = 0  # 每次抢占加一，执行中的动作发现序号变化即中止
+        self.busy = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="motion-executor", daemon=True)
+        self._thread.start()
+
+    def submit(self, motions, preempt=True):
+        """提交动作序列后立即返回；preempt时丢弃尚未执行的动作并中止当前动作"""
+        with self._cond:
+            if preempt:
+                self.generation += 1
+                self.pending.clear()
+            self.pending.extend(motions)
+            self._cond.notify_all()
+
+    def stop(self):
+        """立即中止所有动作并停止运动"""
+        self.submit([call("StopMove")])
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self.pending:
+                    self.busy = False
+                    self._cond.wait()
+                motion = self.pending.popleft()
+                generation = self.generation
+                self.busy = True
+            try:
+                completed = self._execute(motion, generation)
+                with self._cond:
+                    idle = not self.pending
+                # 速度指令序列正常结束后立即停止，不等待运控超时
+                if completed and idle and motion.kind == "move":
+                    self.client.StopMove()
+            except Exception as e:
+                print(f"运动指令执行失败: {type(e).__name__} - {e}")
+
+    def _execute(self, motion, generation):
+        if motion.kind == "call":
+            getattr(self.client, motion.args[0])(*motion.args[1:])
+            return True
+        deadline = time.monotonic() + motion.duration
+        if motion.kind == "wait":
+            return self._sleep_until(deadline, generation)
+        next_tick = time.monotonic()
+        while next_tick < deadline:
+            self.client.Move(*motion.args)
+            next_tick += self.period
+            if not self._sleep_until(min(next_tick, deadline), generation):
+                return False
+        return True
+
+    def _sleep_until(self, moment, generation):
+        """等待到指定时刻，期间被抢占则返回False"""
+        with self._cond:
+            while generation == self.generation:
+                remaining = moment - time.monotonic()
+                if remaining <= 0:
+                    return True
+                self._cond.wait(remaining)
+            return False
@@ -0,0 +1,59 @@
+from math import gcd
+import numpy as np
+
+
+"""
+流式多相重采样
+按有理数比例up/down（如48k→16k为1/3，44.1k→16k为160/441）重采样，低通滤波器为Kaiser窗sinc，
+两侧各保留zero_crossings个过零点（以较低的奈奎斯特频率计），拆分为up个子滤波器，
+每个输出采样只计算所需的一个子滤波器。
+每个音频块内全部输出采样一次性以NumPy索引和einsum计算；块间保留taps-1个输入采样，
+分块处理与整段处理结果一致，可直接在音频回调中使用。
+"""
+
+
+class StreamingResampler:
+    def __init__(self, in_rate, out_rate, zero_crossings=32, beta=8.0, cutoff=0.9):
+        divisor = gcd(int(in_rate), int(out_rate))
+        self.in_rate = int(in_rate)
+        self.out_rate = int(out_rate)
+        self.up = self.out_rate // divisor
+        self.down = self.in_rate // divisor
+        # 每个子滤波器的阶数（即每个输出采样用到的输入采样数）
+        taps = int(np.ceil(2 * zero_crossings * max(self.up, self.down) / self.up))
+        self.taps = taps
+
+        # 原型低通：在up倍上采样率下设计，截止频率为较低奈奎斯特频率的cutoff倍
+        length = taps * self.up
+        t = np.arange(length) - (length - 1) / 2
+        fc = cutoff * 0.5 / max(self.up, self.down)
+        prototype = 2 * fc * np.sinc(2 * fc * t) * np.kaiser(length, beta) * self.up
+        # bank[phase, k]对应输入x[base - k]的系数
+        self.bank = prototype.reshape(taps, self.up).T.astype(np.float32).copy()
+        self.offsets = np.arange(taps)
+
+        self.history = np.zeros(taps - 1, dtype=np.float32)
+        self.consumed = 0  # 已输入的采样数
+        self.next_output = 0  # 下一个输出采样在上采样域中的位置
+
+    def process(self, block):
+        """输入一块单声道采样，返回该块可以产生的全部输出采样；int16输入返回int16"""
+        samples = np.asarray(block).reshape(-1)
+        is_int16 = samples.dtype == np.int16
+        x = np.concatenate((self.history, samples.astype(np.float32)))
+        start = self.consumed - len(self.history)  # x[0]的全局输入序号
+        self.consumed += len(samples)
+
+        positions = np.arange(self.next_output, self.consumed * self.up, self.down)
+        if len(positions):
+            self.next_output = int(positions[-1]) + self.down
+            base = positions // self.up - start
+            phases = positions % self.up
+            output = np.einsum("nk,nk->n", x[base[:, None] - self.offsets], self.bank[phases])
+        else:
+            output = np.zeros(0, dtype=np.float32)
+        self.history = x[len(x) - (self.taps - 1):]
+
+        if is_int16:
+            return np.clip(np.rint(output), -32768, 32767).astype(np.int16)
+        return output.astype(np.float32)
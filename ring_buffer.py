@@ -0,0 +1,49 @@
+import numpy as np
+
+
+class AudioRingBuffer:
+    """预分配的单声道int16环形缓冲区
+
+    写入位置使用单调递增的全局采样序号，区间[start, end)通过取模定位到缓冲区，
+    预录音区与录音区只是两个序号区间，无需为每个音频块单独分配内存。
+    只允许一个线程（音频回调）写入；读取方拿到序号区间后在缓冲区回绕覆盖前取走数据即可，无需加锁。
+    """
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self.data = np.zeros(self.capacity, dtype=np.int16)
+        self.write_pos = 0  # 下一个写入采样的全局序号
+
+    def write(self, block):
+        """写入一个音频块（由音频回调调用）"""
+        block = block.reshape(-1)
+        if len(block) > self.capacity:
+            self.write_pos += len(block) - self.capacity
+            block = block[-self.capacity:]
+        n = len(block)
+        start = self.write_pos % self.capacity
+        first = min(n, self.capacity - start)
+        self.data[start:start + first] = block[:first]
+        self.data[:n - first] = block[first:]
+        self.write_pos += n
+
+    def oldest(self):
+        """缓冲区中仍然有效的最早采样序号"""
+        return max(0, self.write_pos - self.capacity)
+
+    def view(self, start, end):
+        """返回区间[start, end)的数据：未跨越缓冲区末尾时为零拷贝视图，否则为一次拼接拷贝
+
+        视图在缓冲区回绕覆盖该区间之前有效
+        """
+        if start < self.oldest() or end > self.write_pos or start > end:
+            raise IndexError(f"range [{start}, {end}) not in buffer")
+        begin = start % self.capacity
+        stop = begin + (end - start)
+        if stop <= self.capacity:
+            return self.data[begin:stop]
+        return np.concatenate((self.data[begin:], self.data[:stop - self.capacity]))
+
+    def copy(self, start, end):
+        """以一次连续拷贝取出区间[start, end)的数据"""
+        segment = self.view(start, end)
+        return segment.copy() if segment.base is not None else segment
@@ -0,0 +1,160 @@
+from collections import deque
+import threading
+import itertools
+import time
+
+
+"""
+语音处理任务调度器
+每段语音（识别+指令提取+大模型+语音合成）作为一个任务提交，由固定数量的工作线程执行，
+排队数量有上限，播报严格按照提交顺序进行。
+排队已满或有新任务到来时的处理策略（队列已满时均丢弃最早排队的任务）：
+    drop_oldest    不打断更早的任务
+    latest_wins    新任务到来时打断所有更早任务的回答播报
+    cancel_on_wake 识别到唤醒词的任务调用preempt，打断所有更早任务的回答播报
+                   （preempt在新任务的工作线程中调用，需要至少2个工作线程才能打断正在播报的任务）
+打断只作用于回答阶段：任务调用playback_turn()进入回答阶段之前（识别、指令提取）不会被取消，
+进入回答阶段时若已有更新的任务发起打断，则直接跳过回答。这样紧跟在口令之后的咳嗽、噪声等语音段不会让口令丢失。
+"""
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+DROPPED = "dropped"
+CANCELLED = "cancelled"
+FAILED = "failed"
+
+
+class JobCancelled(Exception):
+    """任务已被取消"""
+
+
+class UtteranceJob:
+    def __init__(self, seq, target, args, scheduler):
+        self.seq = seq
+        self.target = target
+        self.args = args
+        self.state = QUEUED
+        self.submit_time = time.time()
+        self.start_time = None
+        self.end_time = None
+        self.answering = False  # 已进入回答阶段，可被更新的任务打断
+        self._cancel_event = threading.Event()
+        self._scheduler = scheduler
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def check(self):
+        """在各处理阶段之间调用，任务已被取消时抛出JobCancelled"""
+        if self.cancelled:
+            raise JobCancelled(f"job {self.seq} cancelled")
+
+    def playback_turn(self):
+        """进入回答阶段：此后可被更新的任务打断；阻塞直到所有更早提交的任务结束，保证按提交顺序播报"""
+        self._scheduler._enter_answer(self)
+        self.check()
+        self._scheduler._wait_turn(self)
+        self.check()
+
+
+class UtteranceScheduler:
+    policies = ("drop_oldest", "latest_wins", "cancel_on_wake")
+
+    def __init__(self, workers=1, max_queue=2, policy="drop_oldest", on_cancel=None):
+        if policy not in self.policies:
+            raise ValueError(f"unknown policy: {policy}")
+        if policy == "cancel_on_wake" and workers < 2:
+            print("cancel_on_wake策略只有一个工作线程时无法打断正在执行的任务，请增加工作线程或使用latest_wins")
+        self.max_queue = max_queue
+        self.policy = policy
+        self.on_cancel = on_cancel  # 取消正在执行的任务时调用，如清空播放队列
+        self.pending = deque()
+        self.interrupt_before = -1  # 序号小于该值的任务进入回答阶段时直接取消
+        self.active = {}  # 尚未结束的任务（排队中及执行中），按序号索引
+        self.counts = {DONE: 0, DROPPED: 0, CANCELLED: 0, FAILED: 0}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        for i in range(workers):
+            threading.Thread(target=self._worker, name=f"utterance-worker-{i}", daemon=True).start()
+
+    def submit(self, target, *args):
+        """提交任务，target将以target(job, *args)的形式在工作线程中执行"""
+        with self._cond:
+            job = UtteranceJob(next(self._seq), target, args, self)
+            if self.policy == "latest_wins":
+                self._cancel_older(job.seq)
+            while len(self.pending) >= self.max_queue:
+                dropped = self.pending.popleft()
+                dropped._cancel_event.set()
+                self._finish(dropped, DROPPED)
+                print(f"任务队列已满，丢弃任务 {dropped.seq}")
+            self.pending.append(job)
+            self.active[job.seq] = job
+            self._cond.notify_all()
+            return job
+
+    def preempt(self, job):
+        """识别到新的唤醒词时调用，cancel_on_wake策略下打断所有更早任务的回答"""
+        if self.policy != "cancel_on_wake":
+            return
+        with self._cond:
+            self._cancel_older(job.seq)
+
+    def stats(self):
+        """返回排队深度、执行中任务数及各结束状态的累计数量"""
+        with self._cond:
+            running = sum(1 for job in self.active.values() if job.state == RUNNING)
+            return {"queued": len(self.pending), "running": running, **self.counts}
+
+    def _cancel_older(self, seq):
+        # 调用方需持有锁；只取消已进入回答阶段的任务，其余任务在进入回答阶段时取消
+        self.interrupt_before = max(self.interrupt_before, seq)
+        interrupted = False
+        for job in list(self.active.values()):
+            if job.seq < seq and job.answering:
+                job._cancel_event.set()
+                interrupted = True
+        self._cond.notify_all()
+        if interrupted and self.on_cancel:
+            self.on_cancel()
+
+    def _finish(self, job, state):
+        # 调用方需持有锁
+        job.state = state
+        job.end_time = time.time()
+        self.active.pop(job.seq, None)
+        self.counts[state] += 1
+        self._cond.notify_all()
+
+    def _enter_answer(self, job):
+        with self._cond:
+            job.answering = True
+            if job.seq < self.interrupt_before:
+                job._cancel_event.set()
+                self._cond.notify_all()
+
+    def _wait_turn(self, job):
+        with self._cond:
+            while not job.cancelled and min(self.active) != job.seq:
+                self._cond.wait()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self.pending:
+                    self._cond.wait()
+                job = self.pending.popleft()
+                job.state = RUNNING
+                job.start_time = time.time()
+            try:
+                job.target(job, *job.args)
+                state = CANCELLED if job.cancelled else DONE
+            except JobCancelled:
+                state = CANCELLED
+            except Exception as e:
+                print(f"{type(e).__name__} - {e}")
+                state = FAILED
+            with self._cond:
+                self._finish(job, state)
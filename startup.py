@@ -0,0 +1,127 @@
+import threading
+import time
+
+
+"""
+启动管理
+运动控制、语音识别、语音合成等耗时组件各自在后台线程中加载并预热，互不等待；
+模块中持有的是组件的代理对象，首次访问其属性时才阻塞到该组件就绪，
+因此控制通道等不依赖模型的部分可以先行工作。
+lazy模式下组件直到首次使用才开始加载。
+"""
+
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+class Component:
+    def __init__(self, name, loader, warmup=None):
+        self.name = name
+        self.loader = loader  # 无参函数，返回加载好的对象
+        self.warmup = warmup  # 以加载好的对象调用，执行一次预热推理
+        self.state = PENDING
+        self.value = None
+        self.error = None
+        self.load_time = None
+        self.warmup_time = None
+        self.ready_at = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """在后台线程中开始加载，已开始时忽略"""
+        with self._lock:
+            if self.state != PENDING:
+                return
+            self.state = LOADING
+        threading.Thread(target=self._load, name=f"startup-{self.name}", daemon=True).start()
+
+    def _load(self):
+        begin = time.monotonic()
+        try:
+            value = self.loader()
+            self.load_time = time.monotonic() - begin
+            if self.warmup:
+                begin = time.monotonic()
+                try:
+                    self.warmup(value)
+                except Exception as e:
+                    # 预热失败不影响使用，只是首次推理仍较慢
+                    print(f"⚠️ {self.name}预热失败: {type(e).__name__} - {e}")
+                self.warmup_time = time.monotonic() - begin
+            self.value = value
+            self.state = READY
+            print(f"✅ {self.name}就绪：加载{self.load_time:.2f}秒，预热{self.warmup_time or 0:.2f}秒")
+        except Exception as e:
+            self.error = e
+            self.state = FAILED
+            print(f"❌ {self.name}初始化失败: {type(e).__name__} - {e}")
+        finally:
+            self.ready_at = time.monotonic()
+            self._event.set()
+
+    def get(self, timeout=None):
+        """返回加载好的对象，未就绪时阻塞等待（lazy模式下由此触发加载）"""
+        self.start()
+        if not self._event.wait(timeout):
+            raise TimeoutError(f"{self.name}初始化超时")
+        if self.error is not None:
+            raise RuntimeError(f"{self.name}初始化失败") from self.error
+        return self.value
+
+    @property
+    def ready(self):
+        return self.state == READY
+
+
+class LazyObject:
+    """组件代理：属性访问转发给组件加载好的对象"""
+    def __init__(self, component):
+        object.__setattr__(self, "_component", component)
+
+    def __getattr__(self, name):
+        return getattr(self._component.get(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._component.get(), name, value)
+
+
+class StartupManager:
+    def __init__(self, lazy=False):
+        self.lazy = lazy
+        self.components = {}
+        self.started = time.monotonic()
+
+    def add(self, name, loader, warmup=None):
+        """登记组件并返回其代理对象，非lazy模式下立即开始加载"""
+        component = Component(name, loader, warmup)
+        self.components[name] = component
+        if not self.lazy:
+            component.start()
+        return LazyObject(component)
+
+    def wait(self, *names, timeout=None):
+        """等待指定组件（默认全部）就绪，全部成功时返回True"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        ok = True
+        for name in names or list(self.components):
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            try:
+                self.components[name].get(remaining)
+            except (TimeoutError, RuntimeError):
+                ok = False
+        return ok
+
+    def report(self):
+        """打印各组件状态及耗时"""
+        for component in self.components.values():
+            line = f"{component.name}: {component.state}"
+            if component.load_time is not None:
+                line += f"，加载{component.load_time:.2f}秒"
+            if component.warmup_time is not None:
+                line += f"，预热{component.warmup_time:.2f}秒"
+            if component.ready_at is not None:
+                line += f"，启动后{component.ready_at - self.started:.2f}秒完成"
+            print(line)
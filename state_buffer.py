@@ -0,0 +1,67 @@
+import numpy as np
+
+
+"""
+状态时间序列缓冲区
+每个字段一个预分配的NumPy数组（行为采样、列为通道），按全速率写入环形位置，
+查询时按时间窗口取出有序数据并做向量化统计，写入路径不产生字典或新数组。
+只允许一个线程写入；写完一行后才更新计数，读取方无需加锁。
+"""
+
+
+class StateBuffer:
+    def __init__(self, columns, capacity):
+        """columns为[(字段名, 通道数)]，capacity为保留的采样行数"""
+        self.capacity = int(capacity)
+        self.names = [name for name, _ in columns]
+        self.columns = [np.zeros((self.capacity, width), dtype=np.float32) for _, width in columns]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.time = np.zeros(self.capacity, dtype=np.float64)
+        self.count = 0  # 累计写入的采样数
+
+    def append(self, timestamp, *values):
+        """按columns顺序写入一行采样，每个值为标量或长度等于通道数的序列"""
+        row = self.count % self.capacity
+        self.time[row] = timestamp
+        for column, value in zip(self.columns, values):
+            column[row] = value
+        self.count += 1
+
+    def _order(self, count):
+        # 返回按时间排序的有效行号
+        size = min(count, self.capacity)
+        head = count % self.capacity
+        if count <= self.capacity:
+            return np.arange(size)
+        return np.concatenate((np.arange(head, self.capacity), np.arange(head)))
+
+    def window(self, name, seconds=None, now=None):
+        """返回最近seconds秒（None为全部）的(时间戳数组, 数值数组)，按时间升序"""
+        count = self.count
+        rows = self._order(count)
+        times = self.time[rows]
+        if seconds is not None and len(times):
+            now = times[-1] if now is None else now
+            rows = rows[np.searchsorted(times, now - seconds):]
+            times = self.time[rows]
+        return times, self.columns[self.index[name]][rows]
+
+    def latest(self, name):
+        if not self.count:
+            return None
+        return self.columns[self.index[name]][(self.count - 1) % self.capacity].copy()
+
+    def stats(self, name, seconds=None, percentiles=(50, 95)):
+        """对时间窗口内各通道做向量化统计，返回{"min", "max", "mean", "p50", ...}，窗口为空时返回None"""
+        _, values = self.window(name, seconds)
+        if not len(values):
+            return None
+        result = {
+            "samples": len(values),
+            "min": values.min(axis=0),
+            "max": values.max(axis=0),
+            "mean": values.mean(axis=0),
+        }
+        for q, row in zip(percentiles, np.percentile(values, percentiles, axis=0)):
+            result[f"p{q}"] = row
+        return result
@@ -1,17 +1,26 @@
-from Processor import stt_processor, tts_generator, speech2cmd, sport_client
+from Processor import stt_processor, stt_batcher, tts_generator, tts_sample_rate, audio_player, speech2cmd, is_wake_word, sport_client, motion_executor, flight_recorder, startup, tracer
+from motion import velocity, call, wait
+import flight_recorder as flight
+from control_channel import ControlChannel
+from telemetry import TelemetryWriter
+from state_buffer import StateBuffer
+from scheduler import UtteranceScheduler
+from answer_cache import AnswerCache
+from audio_archive import AudioArchive
+from tracing import Trace
+from ring_buffer import AudioRingBuffer
+from resampler import StreamingResampler
+from vad import ThresholdDetector, AdaptiveDetector, FsmnDetector, START
 from unitree_sdk2py.idl.unitree_go.msg.dds_ import LowState_
 from unitree_sdk2py.core.channel import ChannelSubscriber
-from collections import deque
 import sounddevice as sd
 import numpy as np
 import threading
+import queue
 import requests
 import logging
-import socket
-import wave
 import time
 import json
-import os
 import re
 
 
@@ -28,143 +37,238 @@ logging.getLogger("funasr.utils.cli_utils").disabled = True
 
 # 配置参数
 device_id = len(sd.query_devices()) - 1  # use default input, change in settings
-SampleRate = int(sd.query_devices(device_id, 'input')['default_samplerate'])
-BlockSize = 1024
-Low_Threshold = 15  # 监测响应音量
-High_Threshold = 20  # 开始录音音量
+SampleRate = 16000  # 录音统一的采样率，即识别模型的原生采样率，缓冲、检测、识别及归档均使用该采样率
+BlockSize = 1024  # 每次回调的采集帧数（按采集采样率计）
+
+
+def choose_capture_rate():
+    """设备支持时直接以SampleRate采集，否则以设备默认采样率采集后在回调中重采样"""
+    try:
+        sd.check_input_settings(device=device_id, samplerate=SampleRate, channels=1, dtype="int16")
+        return SampleRate
+    except Exception:
+        return int(sd.query_devices(device_id, 'input')['default_samplerate'])
+
+
+CaptureRate = choose_capture_rate()
+Endpoint_Detector = "adaptive"  # 端点检测：adaptive（自适应噪声底）/ threshold（固定阈值）/ fsmn（FSMN-VAD）
+High_Threshold = 20  # 固定阈值检测的开始录音音量
 PreRecord = 1  # 预录音时长/s
-SilenceCut = 1  # 结束录音检测时长
-Gain_Factor = 2  # 增益系数
-Save_Path = "recordings"
-os.makedirs(Save_Path, exist_ok=True)
-os.makedirs('voices', exist_ok=True)
+MaxRecord = 30  # 单段录音最长时长/s，超出后强制结束
+SilenceCut = 1  # 固定阈值检测的结束录音检测时长
+Gain_Factor = 2  # 固定阈值检测的增益系数
+Streaming_ASR = False  # 流式识别：由VAD逐块检测端点并输出部分结果，替代音量阈值+整句识别
+Job_Workers = 1  # 语音处理工作线程数，多于1时排队的录音可合并为一批识别
+Job_Queue_Size = 2  # 最多排队的语音段数
+# 排队策略：drop_oldest / latest_wins / cancel_on_wake，打断只作用于回答播报，每段语音都会完成识别和指令提取
+# 唤醒词要等新任务识别完成才能判断，cancel_on_wake需要至少2个工作线程，否则新任务要等旧回答播完才开始执行；
+# 单个工作线程时使用latest_wins，新语音段提交时即打断正在播报的回答
+Job_Policy = "latest_wins"
+Archive_Path = "recordings"  # 录音及回答语音的归档目录
+Archive_Recordings = False  # 是否归档每段录音及其识别结果（后台线程压缩写入，不影响识别流程）
+Archive_Replies = False  # 是否归档回答的合成语音
+Archive_Format = "FLAC"  # 归档格式：FLAC / OGG / WAV
+Archive_Max_MB = 512  # 归档总大小上限/MB，超出后从最早的文件开始删除
+Archive_Max_Days = 30  # 归档保留天数，None为不按时间删除
 
 # 远程控制及服务器交互参数
 equip_id = "1001"
 SERVER_IP = "47.111.140.142"
 SERVER_PORT = 9000
 running = True
-state_freq = 10
-lock = threading.Lock()
+state_freq = 10  # 状态采样频率/Hz
+Telemetry_Encoding = "state"  # 遥测编码：state（原有状态帧，服务器已支持）/ json / binary（服务器支持后再启用）
+Telemetry_Flush = 2  # 遥测合并发送间隔/s
+Telemetry_Refresh = 10  # 数值不变时也完整上报的间隔/s，与原有状态帧的发送周期一致
+Telemetry_Fields = ["energy_remain", "mainboard_tempera", "voltage", "current",
+                    "bat1_tempera", "bat2_tempera", "mcu_res_tempera", "mcu_mos_tempera"]
+Telemetry_Deadbands = {"energy_remain": 0, "mainboard_tempera": 0.5, "voltage": 0.1, "current": 0.2,
+                       "bat1_tempera": 0.5, "bat2_tempera": 0.5, "mcu_res_tempera": 0.5, "mcu_mos_tempera": 0.5}
+Remote_Move_Time = 1  # 远程移动指令的持续时间/s
+Heartbeat_Frame = None  # 心跳帧内容（dict，如{"type": "heartbeat", "id": equip_id}），服务器支持前保持None不发送
+Heartbeat_Interval = 5  # 心跳发送及连接超时检查间隔/s
+Idle_Timeout = None  # 超过该时长未收到服务器数据视为连接失效/s，服务器不回复心跳时保持None
+Flight_State_Every = 10  # 每隔多少条LowState写入一次飞行记录
 
 # 大模型通信参数
 llm_url_root = "****"
 llm_chat_route = "/ChatMessages"
+LLM_Cache_TTL = 600  # 回答缓存有效期/s
+LLM_Cache_Size = 256  # 最多缓存的回答条数，0为不缓存
+LLM_Cache_Pinyin = False  # 按拼音匹配缓存，合并同音字识别差异
+LLM_Cache_Audio = True  # 同时缓存回答的合成语音，命中后直接播放
+LLM_Cache_Audio_MB = 16  # 缓存语音的总大小上限/MB（int16保存，24kHz约47KB/s），超出后丢弃最久未使用的语音
+Speculative_LLM = True  # 识别结果一到即请求大模型，与指令提取并行，提取到指令后取消请求
+
+
+def process_utterance(job, audio, trace=None):
+    """调度任务：识别一段录音并处理识别结果，trace为端点检测时创建的计时上下文"""
+    with tracer.attach(trace):
+        tracer.observe("queue", job.start_time - job.submit_time)
+        with tracer.span("asr"):
+            result = stt_batcher.process(audio, SampleRate)
+        tracer.mark("asr_done")
+        if Archive_Recordings:
+            archive.record("recording", audio, SampleRate, result)
+        handle_transcript(job, result)
+
+
+def process_transcript(job, result, trace=None):
+    """调度任务：处理流式识别得到的完整结果"""
+    with tracer.attach(trace):
+        handle_transcript(job, result)
+
+
+def handle_transcript(job, result):
+    """调度任务：对识别结果进行指令提取，未提取到指令时请求大模型并播报回答"""
+    flight_recorder.append(flight.ASR, (), result)
+    # 新的唤醒词打断尚未完成的旧回答
+    if is_wake_word(result):
+        scheduler.preempt(job)
+    job.check()
+    entry = llm_client.cache.get(result, llm_chat_route)
+    # 未命中缓存时立即在后台请求大模型，与指令提取并行进行
+    speculation = llm_client.prefetch(result) if entry is None and Speculative_LLM else None
+    try:
+        with tracer.span("speech2cmd"):
+            execution = speech2cmd(result, 0)
+        if execution:
+            tracer.mark("command")
+            return
+
+        # 等待更早的回答播报完毕，保证按语音顺序回答
+        job.playback_turn()
+        if entry is not None and entry.audio is not None:
+            # 常见问题直接播放缓存的语音，不请求大模型也不合成
+            audio_player.write(entry.audio)
+            audio_player.wait()
+            return
+        # 大模型流式输出按句切分后逐句合成播放，首句生成完毕即开始播报
+        if entry is not None:
+            chunks = [entry.answer]
+        else:
+            chunks = speculation or llm_client.iter_answer(result, use_cache=False)
+        pcm = [] if LLM_Cache_Audio or Archive_Replies else None
+        with tracer.span("answer"):
+            tts_generator.speak_stream(chunks, audio_player, cancelled=lambda: job.cancelled, pcm_out=pcm)
+        if pcm and not job.cancelled:
+            reply = np.concatenate(pcm)
+            if LLM_Cache_Audio:
+                llm_client.cache.attach_audio(result, reply, llm_chat_route)
+            if Archive_Replies:
+                archive.record("reply", reply, tts_sample_rate, result)
+    finally:
+        # 提取到指令或任务被取消时断开尚未结束的大模型请求
+        if speculation is not None:
+            speculation.cancel()
+
+
+def create_detector():
+    """按Endpoint_Detector创建录音端点检测器"""
+    if Endpoint_Detector == "threshold":
+        return ThresholdDetector(SampleRate, High_Threshold, SilenceCut, Gain_Factor)
+    if Endpoint_Detector == "fsmn":
+        return FsmnDetector(stt_processor.load_stream_vad(), SampleRate)
+    return AdaptiveDetector(SampleRate)
 
 
 class AudioRecorder:
     def __init__(self):
         self.recording = False
-        self.last_loud_time = 0
-        self.last_activity_time = 0
-        self.should_stop = False
+        self.record_start = 0
+
+        # 预分配环形缓冲区：预录音区和录音区均为其中的采样序号区间
+        capacity = int(SampleRate * (MaxRecord + PreRecord + 2))  # 额外2秒供检测线程取走数据
+        self.ring = AudioRingBuffer(capacity)
 
-        # 预录音缓冲区和数据缓存
-        buffer_size = int(SampleRate * PreRecord / BlockSize)
-        self.buffer = deque(maxlen=buffer_size)
-        self.data_list = []
+        # 回调线程只写入缓冲区并发布写入位置，端点检测与录音提取在检测线程中完成；
+        # 检测器在检测线程中创建，fsmn检测器等待识别模型加载时不阻塞启动，期间的录音暂存在缓冲区中
+        self.detector = None
+        self.detector_offset = 0  # 检测器采样序号与缓冲区采样序号之差
+        self.positions = queue.SimpleQueue()
+        threading.Thread(target=self._detect, daemon=True).start()
+
+        # 设备不支持SampleRate采集时，在回调中流式重采样
+        self.resampler = StreamingResampler(CaptureRate, SampleRate) if CaptureRate != SampleRate else None
 
         # 监听控制标志和音频流对象
         self.is_listening = False
         self.stream = None
+        self.asr_stream = None  # 流式识别会话
 
         self._lock = threading.Lock()
 
     def audio_callback(self, indata, frames, time_info, status):
         if not self.is_listening:  # 仅在监听状态下处理音频
             return
-        # 持续更新预录音区，超出部分会从头开始自动删除
-        current_time = time.time()
-        self.buffer.append(indata.copy())
-
-        # 计算音量
-        rms = np.sqrt(np.mean(indata.astype(np.float32) ** 2)) * Gain_Factor
-        volume_percent = (rms / 32767) * 100
+        if self.resampler:
+            indata = self.resampler.process(indata)
+        if self.asr_stream:
+            # 流式识别模式下端点由VAD决定，回调只负责入队
+            self.asr_stream.push(indata)
+            return
+        # 持续写入环形缓冲区，超出容量的部分自动覆盖
+        self.ring.write(indata)
+        self.positions.put(self.ring.write_pos)
 
-        with self._lock:
-            if self.should_stop:
-                return
+    def _detect(self):
+        """检测线程：按顺序把新写入的音频送入端点检测器"""
+        try:
+            self.detector = create_detector()
+        except Exception as e:
+            print(f"端点检测器创建失败，改用自适应检测：{type(e).__name__} - {e}")
+            self.detector = AdaptiveDetector(SampleRate)
+        processed = 0
+        while True:
+            position = self.positions.get()
+            oldest = self.ring.oldest()
+            if processed < oldest:
+                # 检测落后超过缓冲区容量，跳过已被覆盖的数据
+                print("端点检测滞后，部分音频已被覆盖")
+                self.detector_offset += oldest - processed
+                processed = oldest
+            if position <= processed:
+                continue  # 滞后期间排队的写入位置已被跳过
+            try:
+                block = self.ring.view(processed, position)
+            except IndexError:
+                continue  # 取数据前又被覆盖，下一轮按滞后处理
+            processed = position
+            try:
+                for event, index in self.detector.process(block):
+                    if event == START:
+                        self.start_recording(index + self.detector_offset)
+                    else:
+                        self.stop_recording(index + self.detector_offset)
+                if self.recording and position - self.record_start >= MaxRecord * SampleRate:
+                    # 超长录音强制切分，后续语音接续录制
+                    self.stop_recording(position)
+                    self.recording = True
+                    self.record_start = position
+            except Exception as e:
+                # 检测或提交出错时只丢弃这一块，检测线程继续运行
+                print(f"端点检测出错：{type(e).__name__} - {e}")
 
-        # 录音逻辑
+    def start_recording(self, index):
+        # 录音起点向前包含预录音区
         if self.recording:
-            if volume_percent >= High_Threshold:
-                self.last_loud_time = current_time
-            elif current_time - self.last_loud_time >= SilenceCut:
-                # 保留阈值激活后两秒的内容，防止信息丢失
-                self.stop_recording()
-            self.data_list.append(indata.copy())
-        else:
-            if volume_percent >= High_Threshold:
-                self.start_recording()
-                print("开始录音")
-                self.last_loud_time = current_time
-        # 发送提示逻辑
-        if volume_percent >= Low_Threshold and current_time - self.last_activity_time > SilenceCut/2:
-            self.last_activity_time = current_time
-
-    def start_recording(self):
-        with self._lock:
-            self.recording = True
-            self.data_list = list(self.buffer)
-
-    def stop_recording(self):
-        with self._lock:
-            if not self.recording:
-                return
-
-            self.should_stop = True
-            self.recording = False
-
-            # 裁剪末尾静音
-            total_frames = len(self.data_list) * BlockSize
-            remove_frames = SilenceCut * SampleRate
-            keep_frames = total_frames - remove_frames
-
-            if keep_frames <= 0:
-                # print("录音过短，已丢弃")
-                self.data_list = []
-                self.should_stop = False
-                return
-
-            full_blocks = keep_frames // BlockSize
-            remainder = keep_frames % BlockSize
-
-            truncated = self.data_list[:full_blocks]
-            if remainder > 0 and full_blocks < len(self.data_list):
-                last_block = self.data_list[full_blocks][:remainder]
-                truncated.append(last_block)
-
-            filename = os.path.join(Save_Path, f"recording_{int(self.last_loud_time)}.wav")
-            with wave.open(filename, "wb") as f:
-                f.setnchannels(1)
-                f.setsampwidth(2)
-                f.setframerate(SampleRate)
-                for chunk in truncated:
-                    f.writeframes(chunk.tobytes())
-                # print(f"文件保存：{filename}")
-            
-            def async_process():
-                execution = 0
-                try:
-                    result = stt_processor.process(filename)
-                    execution = speech2cmd(result, execution)
-                    
-                    if not execution:
-                        tts_path = os.path.join("voices", f"{str(time.time())}.wav")
-                        
-                        # 使用LLMClient处理请求
-                        response = llm_client.query(result)  # 直接获取完整响应
-                        
-                        # 生成语音
-                        tts_generator.generate(response, tts_path)
-                        tts_generator.play_audio(tts_path)
-                except Exception as e:
-                    print(f"{type(e).__name__} - {e}")
-
-            threading.Thread(target=async_process).start()
+            return
+        self.recording = True
+        self.record_start = max(self.ring.oldest(), index - int(PreRecord * SampleRate))
+        print("开始录音")
 
-            self.data_list = []
-            self.should_stop = False
+    def stop_recording(self, end):
+        if not self.recording:
+            return
+        self.recording = False
+        # 录音开头在检测滞后时可能已被覆盖，只取仍在缓冲区中的部分
+        start = max(self.record_start, self.ring.oldest())
+        if end <= start:
+            # print("录音过短，已丢弃")
+            return
+        # 从环形缓冲区一次性取出录音，直接以内存缓冲区交给识别模型
+        audio = self.ring.copy(start, end)
+        scheduler.submit(process_utterance, audio, Trace())
 
     # 控制音频流的方法
     def start_listening(self):
@@ -172,8 +276,14 @@ class AudioRecorder:
             if self.is_listening:
                 return
             self.is_listening = True
+            if Streaming_ASR:
+                self.asr_stream = stt_processor.create_stream(
+                    SampleRate,
+                    on_partial=lambda text: print(f"识别中: {text}"),
+                    on_final=lambda text: scheduler.submit(process_transcript, text, Trace())
+                )
             self.stream = sd.InputStream(
-                samplerate=SampleRate,
+                samplerate=CaptureRate,
                 blocksize=BlockSize,
                 device=device_id,
                 channels=1,
@@ -191,11 +301,22 @@ class AudioRecorder:
                 self.stream.stop()
                 self.stream.close()
                 self.stream = None
+            if self.asr_stream:
+                self.asr_stream.close()
+                self.asr_stream = None
 
 
 class Go2Monitor:
-    def __init__(self, id):
+    # 全速率记录的LowState字段：(字段名, 通道数)
+    history_columns = [
+        ("motor_temp", 12), ("motor_tau", 12), ("motor_q", 12), ("motor_dq", 12),
+        ("imu_gyro", 3), ("imu_acc", 3), ("imu_rpy", 3),
+        ("foot_force", 4), ("power_v", 1), ("power_a", 1),
+    ]
+
+    def __init__(self, id, history_seconds=60, state_rate=500):
         self.low_state = None
+        self.history = StateBuffer(self.history_columns, history_seconds * state_rate)
 
         # 创建状态订阅器
         self.sub = ChannelSubscriber("rt/lowstate", LowState_)
@@ -207,8 +328,47 @@ class Go2Monitor:
         time.sleep(0.5)
 
     def _state_handler(self, msg: LowState_):
-        """内部状态处理回调"""
+        """内部状态处理回调：保存最新状态并按全速率写入时间序列缓冲区"""
         self.low_state = msg
+        motors = msg.motor_state[:12]
+        imu = msg.imu_state
+        self.history.append(
+            time.time(),
+            [m.temperature for m in motors],
+            [m.tau_est for m in motors],
+            [m.q for m in motors],
+            [m.dq for m in motors],
+            imu.gyroscope,
+            imu.accelerometer,
+            imu.rpy,
+            msg.foot_force,
+            msg.power_v,
+            msg.power_a,
+        )
+        if self.history.count % Flight_State_Every == 0:
+            flight_recorder.append(flight.STATE, [
+                msg.power_v, msg.power_a, max(m.temperature for m in motors), *imu.rpy, *msg.foot_force
+            ])
+
+    def rolling_stats(self, name, seconds=10, percentiles=(50, 95)):
+        """最近seconds秒内某字段各通道的min/max/mean/分位数，字段名见history_columns"""
+        return self.history.stats(name, seconds, percentiles)
+
+    def overheated_motors(self, threshold=70, seconds=5):
+        """返回最近seconds秒平均温度超过threshold(°C)的电机序号"""
+        stats = self.history.stats("motor_temp", seconds)
+        if stats is None:
+            return []
+        return [int(i) for i in np.flatnonzero(stats["mean"] > threshold)]
+
+    def current_spike(self, seconds=10, ratio=2.0):
+        """最近1秒的电流峰值超过seconds秒窗口平均值ratio倍时返回该峰值，否则返回None"""
+        baseline = self.history.stats("power_a", seconds)
+        recent = self.history.stats("power_a", 1)
+        if baseline is None or recent is None:
+            return None
+        peak, mean = float(recent["max"][0]), float(baseline["mean"][0])
+        return peak if abs(peak) > abs(mean) * ratio else None
 
     def get_battery_info(self):
         """获取电池信息
@@ -247,79 +407,31 @@ class Go2Monitor:
 
 
 class TCPClient:
-    def __init__(self, sport_client):
-        self.sock = None
-        self.connected = False
+    def __init__(self, sport_client, executor):
         self.sport_client = sport_client
-        self.reconnect_interval = 5
-        self.buffer = b""  # 添加接收缓冲区
+        self.executor = executor  # 远程指令与语音指令共用运动执行器，互相抢占
         self.known_commands = ["forward", "backward", "left", "right", "stop", "sitdown", "standup"]  # 已知指令列表
+        heartbeat = (json.dumps(Heartbeat_Frame) + '\n').encode('utf-8') if Heartbeat_Frame else None
+        self.channel = ControlChannel(
+            SERVER_IP, SERVER_PORT, self.process_message,
+            known_commands=self.known_commands,
+            heartbeat=heartbeat,
+            heartbeat_interval=Heartbeat_Interval,
+            idle_timeout=Idle_Timeout
+        )
     
-    def connect(self):
-        while True:
-            try:
-                self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                self.sock.settimeout(10)
-                self.sock.connect((SERVER_IP, SERVER_PORT))
-                
-                # 设置 TCP_NODELAY 禁用 Nagle 算法
-                self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
-                
-                self.connected = True
-                self.sock.settimeout(None)
-                print("✅ 已连接云服务器")
-                return True
-            except socket.timeout:
-                print("⌛ 连接超时，重试中...")
-            except Exception as e:
-                print(f"❌ 连接失败: {str(e)}")
-            print(f"⏳ {self.reconnect_interval}秒后尝试重新连接...")
-            time.sleep(self.reconnect_interval)
+    @property
+    def connected(self):
+        return self.channel.connected
     
-    def receive_commands(self):
-        while True:
-            if not self.connected:
-                self.connect()
-                continue
-            
-            try:
-                data = self.sock.recv(256)
-                if not data:
-                    raise ConnectionError("连接中断")
-                
-                # 添加到缓冲区
-                self.buffer += data
-                
-                # 处理缓冲区中的所有完整消息
-                while self.buffer:
-                    # 方案1: 尝试按消息边界分割
-                    if b'\n' in self.buffer:
-                        line, _, self.buffer = self.buffer.partition(b'\n')
-                        message = line.decode('utf-8').strip()
-                        self.process_message(message)
-                    # 方案2: 尝试识别已知指令
-                    else:
-                        found = False
-                        for cmd in self.known_commands:
-                            cmd_bytes = cmd.encode('utf-8')
-                            if self.buffer.startswith(cmd_bytes):
-                                # 提取并处理指令
-                                message = cmd_bytes.decode('utf-8')
-                                self.buffer = self.buffer[len(cmd_bytes):]
-                                self.process_message(message)
-                                found = True
-                                break
-                        
-                        # 如果没有找到完整指令，等待更多数据
-                        if not found:
-                            break
-            except Exception as e:
-                print(f"⚠️ 接收错误: {str(e)}")
-                self.connected = False
+    def start(self):
+        """在后台事件循环中连接服务器并接收指令，断线后自动重连"""
+        self.channel.start()
     
     def process_message(self, message):
         """处理单条消息"""
         print(f"📥 收到指令: {message}")
+        flight_recorder.append(flight.REMOTE, (), message)
         self.execute_command(message)
 
     def execute_command(self, cmd):
@@ -327,52 +439,50 @@ class TCPClient:
         cmd = cmd.strip().lower()
 
         if cmd == "forward":
-            self.sport_client.Move(0.6, 0, 0)
+            self.executor.submit([velocity(0.6, 0, 0, Remote_Move_Time)])
             print("执行: 前进")
         elif cmd == "backward":
-            self.sport_client.Move(-0.6, 0, 0)
+            self.executor.submit([velocity(-0.6, 0, 0, Remote_Move_Time)])
             print("执行: 后退")
         elif cmd == "left":
-            self.sport_client.Move(0, 0, 1.0)
+            self.executor.submit([velocity(0, 0, 1.0, Remote_Move_Time)])
             print("执行: 左转")
         elif cmd == "right":
-            self.sport_client.Move(0, 0, -1.0)
+            self.executor.submit([velocity(0, 0, -1.0, Remote_Move_Time)])
             print("执行: 右转")
+        elif cmd == "stop":
+            self.executor.stop()
+            print("执行: 停止")
         elif cmd == "sitdown":
-            self.sport_client.StandDown()
+            self.executor.submit([call("StandDown")])
             print("执行: 坐下")
         elif cmd == "standup":
-            self.sport_client.StandUp()
-            time.sleep(0.5)
-            self.sport_client.BalanceStand()
+            self.executor.submit([call("StandUp"), wait(0.5), call("BalanceStand")])
             print("执行: 站立")
         else:
             print(f"⚠️ 未知指令: {cmd}")
 
-    def send_state(self, data_type, data_id, content):
-        with lock:
-            if not self.connected:
-                print("⚠️ 未连接服务器，无法发送数据")
-                return False
+    def send_frame(self, frame):
+        """发送已编码好的一帧数据，未连接时返回False"""
+        return self.channel.send(frame)
 
-            try:
-                payload = json.dumps({
-                    "type": data_type,
-                    "id": data_id,
-                    "content": content
-                }) + '\n'  # 添加换行符作为分隔符
-                self.sock.sendall(payload.encode('utf-8'))
-                return True
-            except Exception as e:
-                print(f"❌ 发送失败: {str(e)}")
-                self.connected = False
-                return False
+    def send_state(self, data_type, data_id, content):
+        if not self.connected:
+            print("⚠️ 未连接服务器，无法发送数据")
+            return False
+
+        payload = json.dumps({
+            "type": data_type,
+            "id": data_id,
+            "content": content
+        }) + '\n'  # 添加换行符作为分隔符
+        # 放入发送队列后立即返回，不在调用线程中阻塞
+        return self.channel.send(payload.encode('utf-8'))
 
     def close(self):
         global running
         running = False
-        if self.sock:
-            self.sock.close()
+        self.channel.stop()
 
 
 class LLMClient:
@@ -380,6 +490,7 @@ class LLMClient:
         self.base_url = base_url
         self.timeout = timeout
         self.session = requests.Session()
+        self.cache = AnswerCache(LLM_Cache_TTL, LLM_Cache_Size, LLM_Cache_Pinyin, LLM_Cache_Audio_MB << 20)
     
     def clean_response(self, text):
         """清理特殊符号并提取有效内容"""
@@ -398,8 +509,17 @@ class LLMClient:
         text = re.sub(r'\{.*?\}', '', text)
         return text.strip()
     
-    def stream_query(self, query, chat_url=llm_chat_route):
-        """处理流式响应，提取answer字段"""
+    def iter_answer(self, query, chat_url=llm_chat_route, use_cache=True, on_response=None, cancelled=None):
+        """处理流式响应，逐块返回清理后的answer内容，供下游边接收边合成语音
+
+        完整接收的回答写入缓存；use_cache为False时跳过查询缓存（调用方已查询过）；
+        on_response在连接建立后以响应对象调用，供其他线程关闭连接；cancelled返回True时静默结束
+        """
+        if use_cache:
+            entry = self.cache.get(query, chat_url)
+            if entry is not None:
+                yield entry.answer
+                return
         url = self.base_url + chat_url
         headers = {"Content-Type": "application/json"}
         payload = {
@@ -410,9 +530,9 @@ class LLMClient:
             "limit": "string"
         }
         
-        full_response = ""
-        answer_complete = False
-        metadata_detected = False
+        produced = False
+        parts = []
+        begin = time.perf_counter()
         
         try:
             # 使用流式接收
@@ -423,13 +543,18 @@ class LLMClient:
                     stream=True,
                     timeout=self.timeout
             ) as response:
+                if on_response:
+                    on_response(response)
                 
                 if response.status_code != 200:
                     print(f"LLM请求失败: HTTP {response.status_code}")
-                    return "服务暂时不可用，请稍后再试"
+                    yield "服务暂时不可用，请稍后再试"
+                    return
                 
                 # 逐行处理流式响应
                 for line in response.iter_lines():
+                    if cancelled and cancelled():
+                        return
                     if not line:
                         continue
                     
@@ -438,21 +563,18 @@ class LLMClient:
                         chunk = json.loads(line.decode('utf-8'))
                         
                         # 检查是否包含answer字段
-                        if "answer" in chunk and not metadata_detected:
+                        if "answer" in chunk:
                             # 提取并清理内容
                             cleaned = self.clean_response(chunk["answer"])
-                            full_response += cleaned
-                            
-                            # 检查answer是否完整
-                            if cleaned.endswith(('.', '?', '!', '。', '？', '！')):
-                                answer_complete = True
+                            if cleaned:
+                                if not produced:
+                                    tracer.observe("llm_first_chunk", time.perf_counter() - begin)
+                                produced = True
+                                parts.append(cleaned)
+                                yield cleaned
                         
-                        # 检查metadata标记
+                        # 检测到元数据说明回答已结束
                         if "metadata" in chunk:
-                            metadata_detected = True
-                        
-                        # 如果检测到元数据或answer已完成，停止处理
-                        if metadata_detected or answer_complete:
                             break
                     
                     except json.JSONDecodeError:
@@ -463,25 +585,46 @@ class LLMClient:
                             match = re.search(r'"answer":\s*"([^"]+)"', line_str)
                             if match:
                                 cleaned = self.clean_response(match.group(1))
-                                full_response += cleaned
+                                if cleaned:
+                                    if not produced:
+                                        tracer.observe("llm_first_chunk", time.perf_counter() - begin)
+                                    produced = True
+                                    parts.append(cleaned)
+                                    yield cleaned
                     
                     except Exception as e:
                         print(f"处理响应行时出错: {str(e)}")
+                
+                # 完整接收后写入缓存，超时或出错的回答不缓存
+                tracer.observe("llm", time.perf_counter() - begin)
+                self.cache.put(query, "".join(parts), chat_url)
         
         except requests.exceptions.Timeout:
             print("LLM请求超时")
-            if not full_response:
-                return "请求超时，请稍后再试"
+            if not produced:
+                yield "请求超时，请稍后再试"
         
         except Exception as e:
+            # 被取消时连接已由其他线程关闭，读取出错属正常情况
+            if cancelled and cancelled():
+                return
             print(f"未知错误: {str(e)}")
-            if not full_response:
-                return "处理请求时出错"
-        
-        return full_response
+            if not produced:
+                yield "处理请求时出错"
+    
+    def prefetch(self, query, chat_url=llm_chat_route):
+        """立即在后台线程中发起流式请求，返回可迭代回答块的PrefetchedAnswer"""
+        return PrefetchedAnswer(self, query, chat_url)
+    
+    def stream_query(self, query, chat_url=llm_chat_route):
+        """处理流式响应，提取完整的answer字段"""
+        return "".join(self.iter_answer(query, chat_url))
     
     def query(self, query, chat_url=llm_chat_route):
-        """发送查询并获取响应"""
+        """发送查询并获取响应，命中缓存时不请求网络"""
+        entry = self.cache.get(query, chat_url)
+        if entry is not None:
+            return entry.answer
         url = self.base_url + chat_url
         headers = {"Content-Type": "application/json"}
         payload = {
@@ -516,12 +659,14 @@ class LLMClient:
                     answer = data["answer"]
                     # 清理内容
                     cleaned_answer = self.clean_response(answer)
+                    self.cache.put(query, cleaned_answer, chat_url)
                     return cleaned_answer
             
             # 如果找不到预期结构，尝试直接提取answer
             if "answer" in response_data:
-                answer = response_data["answer"]
-                return self.clean_response(answer)
+                answer = self.clean_response(response_data["answer"])
+                self.cache.put(query, answer, chat_url)
+                return answer
             
             # 如果都没有，返回错误信息
             print(f"响应中缺少answer字段: {response_data}")
@@ -535,31 +680,113 @@ class LLMClient:
             print(f"未知错误: {str(e)}")
             return "处理请求时出错"
 
-# 初始化网络控制
-tcp_client = TCPClient(sport_client)
-
-# 初始化语音控制
-recorder = AudioRecorder()
-recorder.start_listening()
-tcp_thread = threading.Thread(target=tcp_client.receive_commands, daemon=True)
-tcp_thread.start()
-
-# 初始化大模型请求处理
-llm_client = LLMClient()
-
-# 初始化状态监控
-monitor = Go2Monitor(equip_id)
-
-try:
-    while True:
-        battery_info = monitor.get_battery_info()
-        tcp_client.send_state("state", monitor.id,
-                              {
-                                  "energy_remain": battery_info['soc'],
-                                  "mainboard_tempera": battery_info['mainboard'],
-                              })
-        time.sleep(state_freq)
-except KeyboardInterrupt:
-    recorder.stop_listening()
-    tcp_client.close()
-    # print("\n程序已终止")
\ No newline at end of file
+class PrefetchedAnswer:
+    """后台接收的大模型回答：迭代时按到达顺序取出回答块，cancel()关闭连接并丢弃其余内容"""
+    def __init__(self, client, query, chat_url):
+        self.chunks = queue.Queue()
+        self.cancelled = False
+        self.response = None
+        self.trace = tracer.current()  # 接收线程沿用发起请求的语音段的计时上下文
+        self._lock = threading.Lock()
+        self._answer = client.iter_answer(query, chat_url, use_cache=False,
+                                          on_response=self._attach, cancelled=lambda: self.cancelled)
+        threading.Thread(target=self._receive, daemon=True).start()
+
+    def _attach(self, response):
+        with self._lock:
+            self.response = response
+            cancelled = self.cancelled
+        if cancelled:
+            response.close()
+
+    def _receive(self):
+        with tracer.attach(self.trace):
+            try:
+                for chunk in self._answer:
+                    if self.cancelled:
+                        break
+                    self.chunks.put(chunk)
+            finally:
+                self._answer.close()
+                self.chunks.put(None)
+
+    def __iter__(self):
+        while not self.cancelled and (chunk := self.chunks.get()) is not None:
+            yield chunk
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            response = self.response
+        if response is not None:
+            response.close()
+
+    close = cancel  # 供speak_stream提前结束时断开连接
+
+
+def report_startup():
+    """所有组件加载完成后打印各自的就绪情况及耗时"""
+    startup.wait()
+    startup.report()
+
+
+def start():
+    """创建并启动各组件；基准测试替换外部依赖后也通过它启动同一套流程"""
+    global tcp_client, scheduler, recorder, llm_client, monitor, telemetry, archive
+
+    # 初始化网络控制：不依赖模型，最先连接，远程指令在运动控制就绪后即可执行
+    tcp_client = TCPClient(sport_client, motion_executor)
+    tcp_client.start()
+    threading.Thread(target=report_startup, daemon=True).start()
+
+    # 初始化大模型请求处理
+    llm_client = LLMClient(llm_url_root)
+
+    # 初始化音频归档：编码及写盘均在归档线程中进行
+    archive = None
+    if Archive_Recordings or Archive_Replies:
+        max_age = Archive_Max_Days * 86400 if Archive_Max_Days else None
+        archive = AudioArchive(Archive_Path, Archive_Max_MB << 20, max_age, Archive_Format)
+
+    # 初始化语音控制：识别模型未就绪时录音照常进行，语音段在队列中等待识别
+    scheduler = UtteranceScheduler(Job_Workers, Job_Queue_Size, Job_Policy, on_cancel=audio_player.clear)
+    stt_batcher.max_callers = Job_Workers  # 只有一个工作线程时不会有第二段录音到来，识别不等待批处理窗口
+    recorder = AudioRecorder()
+    recorder.start_listening()
+
+    # 初始化状态监控，订阅LowState前需完成DDS初始化
+    startup.wait("dds")
+    monitor = Go2Monitor(equip_id)
+    telemetry = TelemetryWriter(tcp_client.send_frame, monitor.id, Telemetry_Fields, Telemetry_Encoding,
+                                Telemetry_Deadbands, flush_interval=Telemetry_Flush,
+                                refresh_interval=Telemetry_Refresh)
+
+
+def main():
+    start()
+    try:
+        while True:
+            battery_info = monitor.get_battery_info()
+            if battery_info:
+                # 采样经死区过滤后由遥测线程合并发送，主循环不会阻塞在网络上
+                telemetry.record({
+                    "energy_remain": battery_info['soc'],
+                    "mainboard_tempera": battery_info['mainboard'],
+                    "voltage": battery_info['voltage'],
+                    "current": battery_info['current'],
+                    "bat1_tempera": battery_info['temperatures']['bat1'],
+                    "bat2_tempera": battery_info['temperatures']['bat2'],
+                    "mcu_res_tempera": battery_info['temperatures']['mcu_res'],
+                    "mcu_mos_tempera": battery_info['temperatures']['mcu_mos'],
+                })
+            time.sleep(1 / state_freq)
+    except KeyboardInterrupt:
+        recorder.stop_listening()
+        tcp_client.close()
+        if archive is not None:
+            archive.flush()
+        # print("\n程序已终止")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import threading
+import base64
+import queue
+import struct
+import json
+import time
+
+
+"""
+遥测上行
+采样经死区过滤后入队即返回，后台线程把一段时间内的采样合并为一帧再交给发送函数。
+帧仍以换行分隔，可选三种编码：
+    state  {"type": "state", "id": 设备号, "content": {字段: 值}}，与原有状态帧格式相同，
+           content为合并本批采样后各字段的最新值（含未变化的字段），服务器无需改动
+    json   {"type": "telemetry", "id": 设备号, "content": [{"t": 时间戳, "v": {字段: 值}}, ...]}
+    binary {"type": "telemetry_bin", "id": 设备号, "fields": 字段数, "content": base64(二进制数据)}
+           二进制数据：<dH 首个采样时间戳、采样数；每个采样 <HI 相对首个采样的毫秒偏移、字段位图，
+           之后按位图顺序排列各字段的float32值。字段序号为构造时fields列表中的位置。
+"""
+
+
+class TelemetryWriter:
+    def __init__(self, send, device_id, fields, encoding="state", deadbands=None,
+                 flush_interval=1.0, max_batch=50, refresh_interval=10, max_pending=1000):
+        if encoding not in ("state", "json", "binary"):
+            raise ValueError(f"unknown encoding: {encoding}")
+        if len(fields) > 32:
+            raise ValueError("binary encoding supports at most 32 fields")
+        self.send = send  # 发送一帧bytes，失败时返回False
+        self.device_id = device_id
+        self.fields = list(fields)
+        self.index = {name: i for i, name in enumerate(self.fields)}
+        self.encoding = encoding
+        self.deadbands = deadbands or {}  # 字段变化超过死区才上报，未配置的字段任何变化都上报
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        # 每隔该时长无论是否变化都完整上报一次，默认与原有状态帧的发送周期(10s)一致，服务器据此判断设备在线
+        self.refresh_interval = refresh_interval
+        self.last_sent = {}
+        self.snapshot = {}  # state编码下各字段最近一次发送的值
+        self.last_refresh = 0
+        self.sent_frames = 0
+        self.dropped = 0
+        self.queue = queue.Queue(max_pending)
+        self._lock = threading.Lock()  # 保护last_sent及last_refresh，发送失败时由发送线程清空
+        self._thread = threading.Thread(target=self._run, name="telemetry-writer", daemon=True)
+        self._thread.start()
+
+    def record(self, values, timestamp=None):
+        """记录一次采样，只保留超出死区的字段，立即返回"""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            refresh = timestamp - self.last_refresh >= self.refresh_interval
+            if refresh:
+                changed = {name: value for name, value in values.items() if name in self.index}
+            else:
+                changed = {}
+                for name, value in values.items():
+                    if name not in self.index:
+                        continue
+                    last = self.last_sent.get(name)
+                    if last is None or abs(value - last) > self.deadbands.get(name, 0):
+                        changed[name] = value
+            if not changed:
+                return False
+            try:
+                self.queue.put_nowait((timestamp, changed))
+            except queue.Full:
+                # 基准值保持不变，被丢弃的变化在下一次采样时重新判断
+                self.dropped += 1
+                return False
+            if refresh:
+                self.last_refresh = timestamp
+            self.last_sent.update(changed)
+        return True
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                sent = self.send(self.encode(batch))
+            except Exception as e:
+                print(f"❌ 遥测发送失败: {str(e)}")
+                sent = False
+            if sent:
+                self.sent_frames += 1
+            else:
+                # 发送失败时清空基准值，恢复连接后完整上报
+                with self._lock:
+                    self.last_sent.clear()
+
+    def encode(self, batch):
+        if self.encoding == "state":
+            for _, values in batch:
+                self.snapshot.update(values)
+            frame = {
+                "type": "state",
+                "id": self.device_id,
+                "content": dict(self.snapshot)
+            }
+        elif self.encoding == "json":
+            frame = {
+                "type": "telemetry",
+                "id": self.device_id,
+                "content": [{"t": round(timestamp, 3), "v": values} for timestamp, values in batch]
+            }
+        else:
+            base = batch[0][0]
+            parts = [struct.pack("<dH", base, len(batch))]
+            for timestamp, values in batch:
+                mask = 0
+                for name in values:
+                    mask |= 1 << self.index[name]
+                ordered = [values[name] for name in self.fields if name in values]
+                parts.append(struct.pack(f"<HI{len(ordered)}f", min(int((timestamp - base) * 1000), 65535), mask, *ordered))
+            frame = {
+                "type": "telemetry_bin",
+                "id": self.device_id,
+                "fields": len(self.fields),
+                "content": base64.b64encode(b"".join(parts)).decode("ascii")
+            }
+        return (json.dumps(frame, separators=(",", ":")) + '\n').encode('utf-8')
+
+
+def decode_binary(content, fields):
+    """解码telemetry_bin帧的content，返回[(时间戳, {字段: 值})]"""
+    data = base64.b64decode(content)
+    base, count = struct.unpack_from("<dH", data)
+    offset = struct.calcsize("<dH")
+    samples = []
+    for _ in range(count):
+        delta, mask = struct.unpack_from("<HI", data, offset)
+        offset += struct.calcsize("<HI")
+        names = [name for i, name in enumerate(fields) if mask >> i & 1]
+        values = struct.unpack_from(f"<{len(names)}f", data, offset)
+        offset += 4 * len(names)
+        samples.append((base + delta / 1000, dict(zip(names, values))))
+    return samples
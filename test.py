@@ -1,16 +1,21 @@
 from kokoro import KPipeline, KModel
 import soundfile as sf
 from playsound import playsound
+import numpy as np
 import requests
 import torch
 import json
 import re
 import os
 
+from audio_player import AudioPlayer
+
 tts_model = 'hexgrad/Kokoro-82M-v1.1-zh'
 tts_model_path = 'ckpts/kokoro-v1.1/kokoro-v1_1-zh.pth'
 tts_config_path = 'ckpts/kokoro-v1.1/config.json'
 tts_timbre_path = "ckpts/kokoro-v1.1/voices/zm_014.pt"
+tts_sample_rate = 24000
+tts_speed = 1.1
 
 
 class LLMClient:
@@ -183,13 +188,25 @@ class Kokoro:
         self.timbre_tensor = torch.load(timbre, weights_only=True)
         print("语音模型初始化完成！")
     
+    def synthesize(self, text):
+        """逐段生成语音，每得到一段即返回其float32 PCM"""
+        for result in self.zh_pipeline(text, voice=self.timbre_tensor, speed=tts_speed):
+            if result.audio is None:
+                continue
+            yield result.audio.cpu().numpy()
+
     def generate(self, text, output_path):
-        # 生成语音
-        self.generator = self.zh_pipeline(text, voice=self.timbre_tensor, speed=1.1)
-        result = next(self.generator)
-        wav = result.audio
-        # 保存文件
-        sf.write(output_path, wav, 24000)
+        # 生成全部分段并拼接后保存，避免长回答被截断
+        segments = list(self.synthesize(text))
+        if not segments:
+            return
+        sf.write(output_path, np.concatenate(segments), tts_sample_rate)
+
+    def speak(self, text, player):
+        """流式合成：每段生成后立即交给播放器，下一段在播放的同时合成"""
+        for pcm in self.synthesize(text):
+            player.write(pcm)
+        player.wait()
     
     def play_audio(self, audio_path):
         abs_path = os.path.abspath(audio_path)
@@ -210,7 +227,6 @@ llm_client = LLMClient()
 response = llm_client.query("你好")  # 直接获取完整响应
 
 tts_generator = Kokoro(tts_model, tts_model_path, tts_config_path, tts_timbre_path)
-tts_path = "output.wav"
-# 生成语音
-tts_generator.generate(response, tts_path)
-tts_generator.play_audio(tts_path)
\ No newline at end of file
+audio_player = AudioPlayer(tts_sample_rate)
+# 流式生成并播放语音
+tts_generator.speak(response, audio_player)
\ No newline at end of file
@@ -0,0 +1,152 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from contextlib import contextmanager
+import itertools
+import threading
+import bisect
+import queue
+import json
+import time
+import os
+
+
+"""
+语音流水线分段计时
+每段录音在端点检测时创建一个Trace（序号 + 起始时刻），处理它的各线程通过attach()关联到该Trace，
+span()/observe()记录各阶段耗时，mark()记录自端点检测起经过的时间。
+耗时累计到按阶段划分的直方图，可导出为Prometheus文本格式（文件或HTTP /metrics），
+可选地把每个事件写成一行JSON：{"trace": 序号, "name": 阶段, "t": 时间戳, "seconds": 耗时}。
+记录一次只有两次计时、一次加锁的计数以及一次不阻塞的入队，适合常开。
+"""
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Trace:
+    _ids = itertools.count(1)
+
+    def __init__(self, start=None):
+        self.id = next(self._ids)
+        self.start = time.monotonic() if start is None else start
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最后一个为超出最大边界的计数
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class Tracer:
+    def __init__(self, log_path=None, metrics_port=None, prefix="voice_stage", max_pending=10000):
+        self.prefix = prefix
+        self.histograms = {}
+        self.dropped = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._events = None
+        if log_path:
+            self._events = queue.Queue(max_pending)
+            threading.Thread(target=self._write_log, args=(log_path,), name="trace-writer", daemon=True).start()
+        if metrics_port:
+            self.serve(metrics_port)
+
+    def current(self):
+        return getattr(self._local, "trace", None)
+
+    @contextmanager
+    def attach(self, trace):
+        """在当前线程中关联trace，退出时恢复原来的关联"""
+        previous = self.current()
+        self._local.trace = trace
+        try:
+            yield trace
+        finally:
+            self._local.trace = previous
+
+    def observe(self, name, seconds, trace=None):
+        trace = trace or self.current()
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+        if self._events is not None:
+            try:
+                self._events.put_nowait((trace.id if trace else None, name, time.time(), seconds))
+            except queue.Full:
+                self.dropped += 1
+
+    @contextmanager
+    def span(self, name):
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - begin)
+
+    def mark(self, name):
+        """记录当前trace自端点检测起经过的时间，未关联trace时忽略"""
+        trace = self.current()
+        if trace is not None:
+            self.observe(name, time.monotonic() - trace.start, trace)
+
+    def _write_log(self, path):
+        with open(path, "a", encoding="utf-8") as f:
+            while True:
+                trace, name, timestamp, seconds = self._events.get()
+                f.write(json.dumps({"trace": trace, "name": name, "t": round(timestamp, 3),
+                                    "seconds": round(seconds, 6)}) + "\n")
+                if self._events.empty():
+                    f.flush()
+
+    def prometheus_text(self):
+        """以Prometheus文本格式导出全部直方图，单位为秒"""
+        with self._lock:
+            snapshot = {name: (list(h.counts), h.sum, h.count, h.buckets) for name, h in self.histograms.items()}
+        lines = [f"# TYPE {self.prefix}_seconds histogram"]
+        for name, (counts, total, count, buckets) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, bucket in zip(buckets, counts):
+                cumulative += bucket
+                lines.append(f'{self.prefix}_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{self.prefix}_seconds_bucket{{stage="{name}",le="+Inf"}} {count}')
+            lines.append(f'{self.prefix}_seconds_sum{{stage="{name}"}} {total:.6f}')
+            lines.append(f'{self.prefix}_seconds_count{{stage="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """写出Prometheus文本文件（供node_exporter textfile采集），先写临时文件再改名"""
+        temp = path + ".tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(temp, path)
+
+    def serve(self, port, host="0.0.0.0"):
+        """在后台线程中提供HTTP /metrics"""
+        tracer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = tracer.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="trace-metrics", daemon=True).start()
+        return server
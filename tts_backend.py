@@ -0,0 +1,36 @@
+from kokoro import KPipeline, KModel
+import torch
+
+
+"""
+Kokoro推理后端
+按设备及精度加载合成模型，供Kokoro与基准测试共用：
+    device     auto（有GPU时用cuda，否则cpu）/ cuda / cpu
+    precision  fp32 / int8（仅CPU，对线性层及LSTM做动态int8量化）
+threads通过torch.set_num_threads生效，是进程级设置，与同一进程中的识别模型共用。
+"""
+
+
+def load_kokoro(repo_id, model_path, config_path, device="auto", precision="fp32", threads=None):
+    """返回(KModel, 中文KPipeline, 实际使用的设备)"""
+    if precision not in ("fp32", "int8"):
+        raise ValueError(f"unknown precision: {precision}")
+    if device == "auto":
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    if precision == "int8" and device != "cpu":
+        raise ValueError("int8 quantization is only supported on cpu")
+    if threads and device == "cpu":
+        torch.set_num_threads(threads)
+    model = KModel(model=model_path, config=config_path, repo_id=repo_id).to(device).eval()
+    if precision == "int8":
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear, torch.nn.LSTM}, dtype=torch.qint8)
+    pipeline = KPipeline(lang_code='z', repo_id=repo_id, model=model)
+    return model, pipeline, device
+
+
+def synthesize(pipeline, text, voice, speed=1.0):
+    """逐段生成语音，每得到一段即返回其float32 PCM"""
+    for result in pipeline(text, voice=voice, speed=speed):
+        if result.audio is None:
+            continue
+        yield result.audio.cpu().numpy()
@@ -0,0 +1,137 @@
+from collections import OrderedDict
+import numpy as np
+import unicodedata
+import threading
+import hashlib
+import os
+import re
+
+
+"""
+语音合成短语缓存
+以(规范化文本, 音色, 语速)为键缓存合成后的PCM，分两级：
+    内存：按最近使用顺序淘汰，总字节数不超过max_bytes
+    磁盘：每条短语一个int16 .npy文件（compress时为压缩的.npz），总字节数超过disk_max_bytes时删除最久未写入的文件
+内存未命中时查磁盘，命中后回填内存。
+"""
+
+
+def normalize_text(text):
+    """全角转半角、去除首尾及连续空白，使同一短语得到相同的键"""
+    text = unicodedata.normalize("NFKC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def tensor_digest(data):
+    """音色等数组内容的摘要，用于区分不同音色"""
+    return hashlib.sha1(np.ascontiguousarray(data).tobytes()).hexdigest()[:16]
+
+
+class PhraseCache:
+    def __init__(self, directory, max_bytes=64 << 20, disk_max_bytes=512 << 20, compress=False):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.compress = compress
+        self.memory = OrderedDict()
+        self.memory_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        # 按修改时间登记已有的磁盘条目，淘汰时从最旧的开始
+        entries = []
+        for name in os.listdir(directory):
+            if name.endswith((".npy", ".npz")):
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, path, stat.st_size))
+        self.disk = OrderedDict((path, size) for _, path, size in sorted(entries))
+        self.disk_bytes = sum(self.disk.values())
+
+    def key(self, text, voice, speed):
+        """voice为音色摘要字符串"""
+        return hashlib.sha1(f"{normalize_text(text)}|{voice}|{speed:g}".encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + (".npz" if self.compress else ".npy"))
+
+    def get(self, key):
+        """返回float32 PCM，未命中时返回None"""
+        with self._lock:
+            pcm = self.memory.get(key)
+            if pcm is not None:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return pcm
+        path = self._path(key)
+        try:
+            if self.compress:
+                with np.load(path) as data:
+                    samples = data["pcm"]
+            else:
+                samples = np.load(path)
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        pcm = samples.astype(np.float32) / 32767
+        with self._lock:
+            self.hits += 1
+            self._remember(key, pcm)
+        return pcm
+
+    def put(self, key, pcm):
+        pcm = np.asarray(pcm, dtype=np.float32)
+        samples = (np.clip(pcm, -1, 1) * 32767).astype(np.int16)
+        path = self._path(key)
+        try:
+            # 先写临时文件再改名，进程中断不会留下残缺的缓存
+            temp = path + ".tmp"
+            with open(temp, "wb") as f:
+                if self.compress:
+                    np.savez_compressed(f, pcm=samples)
+                else:
+                    np.save(f, samples)
+            os.replace(temp, path)
+        except OSError as e:
+            print(f"⚠️ 语音缓存写入失败: {str(e)}")
+            path = None
+        with self._lock:
+            self._remember(key, pcm)
+            if path:
+                self.disk_bytes -= self.disk.pop(path, 0)
+                self.disk[path] = os.path.getsize(path)
+                self.disk_bytes += self.disk[path]
+                while self.disk_bytes > self.disk_max_bytes and len(self.disk) > 1:
+                    old, size = self.disk.popitem(last=False)
+                    self.disk_bytes -= size
+                    try:
+                        os.remove(old)
+                    except OSError:
+                        pass
+
+    def _remember(self, key, pcm):
+        # 调用方持有锁
+        if pcm.nbytes > self.max_bytes:
+            return
+        old = self.memory.pop(key, None)
+        if old is not None:
+            self.memory_bytes -= old.nbytes
+        self.memory[key] = pcm
+        self.memory_bytes += pcm.nbytes
+        while self.memory_bytes > self.max_bytes:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= evicted.nbytes
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_entries": len(self.memory),
+                "memory_bytes": self.memory_bytes,
+                "disk_entries": len(self.disk),
+                "disk_bytes": self.disk_bytes,
+            }
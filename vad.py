@@ -0,0 +1,171 @@
+import numpy as np
+import math
+
+
+"""
+录音端点检测器
+所有检测器接口一致：process(block)按顺序接收int16音频块，返回本块内产生的事件列表，
+每个事件为(START或END, 采样序号)，采样序号从送入的第一个采样开始计数。
+    ThresholdDetector 原有的固定音量阈值
+    AdaptiveDetector  能量/过零率/谱平坦度特征 + 自适应噪声底 + 拖尾(hangover)
+    FsmnDetector      FSMN-VAD流式模型，推理较重，需在检测线程中运行
+"""
+
+START = "start"
+END = "end"
+
+
+class ThresholdDetector:
+    """固定阈值：音量百分比×增益超过high_threshold开始，持续silence秒低于阈值结束"""
+    def __init__(self, sample_rate, high_threshold=20, silence=1, gain=2):
+        self.high_threshold = high_threshold
+        self.silence_samples = int(silence * sample_rate)
+        self.gain = gain
+        self.position = 0
+        self.last_loud = 0
+        self.in_speech = False
+
+    def process(self, block):
+        start = self.position
+        self.position += len(block)
+        rms = np.sqrt(np.mean(block.astype(np.float32) ** 2)) * self.gain
+        loud = rms / 32767 * 100 >= self.high_threshold
+        if loud:
+            self.last_loud = self.position
+        if not self.in_speech and loud:
+            self.in_speech = True
+            return [(START, start)]
+        if self.in_speech and not loud and self.position - self.last_loud >= self.silence_samples:
+            self.in_speech = False
+            return [(END, self.last_loud)]
+        return []
+
+
+class AdaptiveDetector:
+    """自适应噪声底端点检测
+
+    逐帧计算能量(dB)、过零率和谱平坦度（整块向量化计算）。噪声底只在非语音帧上快速下降、缓慢上升，
+    语音中以更慢的速度上升，使持续的电机/风扇噪声最终被吸收。
+    能量高出噪声底snr_db、且频谱不平坦、过零率不高的帧判为语音帧；
+    连续min_speech_ms语音帧判为起点，起点后连续hangover_ms非语音帧判为终点。
+    """
+    def __init__(self, sample_rate, frame_ms=20, snr_db=10.0, max_flatness=0.4, max_zcr=0.4,
+                 min_speech_ms=100, hangover_ms=500, noise_rise=0.05, noise_fall=0.3, min_noise_db=-80.0):
+        self.frame = int(sample_rate * frame_ms / 1000)
+        self.window = np.hanning(self.frame).astype(np.float32)
+        self.snr_db = snr_db
+        self.max_flatness = max_flatness
+        self.max_zcr = max_zcr
+        self.min_speech = max(1, math.ceil(min_speech_ms / frame_ms))
+        self.hangover = max(1, math.ceil(hangover_ms / frame_ms))
+        self.noise_db = None  # 以第一帧能量初始化
+        self.noise_rise = noise_rise
+        self.noise_fall = noise_fall
+        self.min_noise_db = min_noise_db
+
+        self.position = 0  # 已送入的采样数
+        self.residual = np.zeros(0, dtype=np.float32)  # 不足一帧的剩余采样
+        self.in_speech = False
+        self.speech_run = 0
+        self.silence_run = 0
+        self.onset = 0
+        self.last_speech_end = 0
+
+    def features(self, frames):
+        """批量计算各帧能量(dB)、过零率与谱平坦度，frames为(帧数, 帧长)的float32数组"""
+        energy = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+        power = np.abs(np.fft.rfft(frames * self.window, axis=1)) ** 2 + 1e-10
+        flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+        return energy, zcr, flatness
+
+    def process(self, block):
+        block = block.reshape(-1)
+        samples = np.concatenate((self.residual, block.astype(np.float32) / 32768.0))
+        base = self.position - len(self.residual)  # samples[0]对应的采样序号
+        self.position += len(block)
+        count = len(samples) // self.frame
+        self.residual = samples[count * self.frame:]
+        if count == 0:
+            return []
+
+        energy, zcr, flatness = self.features(samples[:count * self.frame].reshape(count, self.frame))
+        tonal = (flatness <= self.max_flatness) & (zcr <= self.max_zcr)
+
+        # 噪声底与状态机需逐帧递推，每块只有少量帧
+        if self.noise_db is None:
+            self.noise_db = max(self.min_noise_db, float(energy[0]))
+        events = []
+        for i in range(count):
+            speech = bool(tonal[i]) and energy[i] >= self.noise_db + self.snr_db
+            if energy[i] < self.noise_db:
+                rate = self.noise_fall
+            else:
+                rate = self.noise_rise / 10 if speech else self.noise_rise
+            self.noise_db = max(self.min_noise_db, self.noise_db + rate * (energy[i] - self.noise_db))
+
+            frame_start = base + i * self.frame
+            if speech:
+                self.last_speech_end = frame_start + self.frame
+            if not self.in_speech:
+                if not speech:
+                    self.speech_run = 0
+                    continue
+                if self.speech_run == 0:
+                    self.onset = frame_start
+                self.speech_run += 1
+                if self.speech_run >= self.min_speech:
+                    self.in_speech = True
+                    self.silence_run = 0
+                    events.append((START, self.onset))
+            elif speech:
+                self.silence_run = 0
+            else:
+                self.silence_run += 1
+                if self.silence_run >= self.hangover:
+                    self.in_speech = False
+                    self.speech_run = 0
+                    events.append((END, self.last_speech_end))
+        return events
+
+
+class FsmnDetector:
+    """FSMN-VAD流式模型端点检测，model为funasr加载的fsmn_vad模型"""
+    def __init__(self, model, sample_rate, chunk_ms=200, endpoint_ms=500):
+        self.model = model
+        self.sample_rate = sample_rate
+        self.chunk_ms = chunk_ms
+        self.chunk_samples = int(sample_rate * chunk_ms / 1000)
+        self.endpoint_ms = endpoint_ms
+        self.cache = {}
+        self.pending = []
+        self.pending_size = 0
+        self.position = 0
+
+    def process(self, block):
+        block = block.reshape(-1)
+        self.position += len(block)
+        self.pending.append(block.astype(np.float32) / 32768.0)
+        self.pending_size += len(block)
+        if self.pending_size < self.chunk_samples:
+            return []
+        chunk = np.concatenate(self.pending)
+        self.pending, self.pending_size = [], 0
+        result = self.model.generate(
+            input=chunk,
+            fs=self.sample_rate,
+            cache=self.cache,
+            is_final=False,
+            chunk_size=self.chunk_ms,
+            max_end_silence_time=self.endpoint_ms,
+            disable_pbar=True
+        )
+        # VAD输出毫秒时间戳：[beg, -1]为起点，[-1, end]为终点，[beg, end]为完整语音段
+        events = []
+        for beg, end in (result[0]["value"] if result else []):
+            if beg != -1:
+                events.append((START, int(beg * self.sample_rate / 1000)))
+            if end != -1:
+                events.append((END, int(end * self.sample_rate / 1000)))
+        return events
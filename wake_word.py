@@ -0,0 +1,155 @@
+from pypinyin import lazy_pinyin
+import re
+
+
+"""
+唤醒词匹配
+唤醒词在启动时一次性转换为音节序列，识别结果每次只转换一次。
+中文按拼音音节、其他文字按单词切分，音节先做近音归一（zh/z、ch/c、sh/s、l/n、ang/an、eng/en、ing/in），
+再在Aho-Corasick多模式索引上匹配；允许误差时按鸽巢原理把唤醒词切成若干片段建索引，
+命中片段后只在附近窗口内验证，匹配代价不随唤醒词数量增长。允许两种误差：
+    近音音节  两个及以上音节的唤醒词中，最多max_distance个音节可替换为近音音节（如gou/go、tu/to），
+             其余音节须完全一致，单个音节不会唤醒
+    编辑距离  三个及以上音节的唤醒词允许max_distance次音节增删改
+"""
+
+FOLD_RULES = [
+    (re.compile(r'^([zcs])h'), r'\1'),
+    (re.compile(r'^l'), 'n'),
+    (re.compile(r'([aei])ng$'), r'\1n'),
+]
+TOKEN_PATTERN = re.compile(r'[a-z]+|[0-9]+')
+
+
+def fold_syllable(syllable):
+    """近音归一，使ASR常见的近音误识别得到相同音节"""
+    for pattern, repl in FOLD_RULES:
+        syllable = pattern.sub(repl, syllable)
+    return syllable
+
+
+def to_syllables(text):
+    """将文本转换为归一化后的音节序列"""
+    syllables = []
+    for item in lazy_pinyin(text):
+        # 非中文部分lazy_pinyin会整体返回，按单词及数字切分
+        syllables.extend(fold_syllable(token) for token in TOKEN_PATTERN.findall(item.lower()))
+    return syllables
+
+
+def similar_syllables(a, b):
+    """近音音节：首字母相同且字母编辑距离不超过1，如gou/go、tu/to、two/to"""
+    if a == b:
+        return True
+    if not a or not b or a[0] != b[0] or abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) == len(b):
+        return sum(x != y for x, y in zip(a, b)) <= 1
+    shorter, longer = sorted((a, b), key=len)
+    return any(longer[:i] + longer[i + 1:] == shorter for i in range(len(longer)))
+
+
+def near_match_at(pattern, syllables, start, limit):
+    """syllables从start起逐音节对齐pattern，不同的音节均为近音且不超过limit个"""
+    if start < 0 or start + len(pattern) > len(syllables):
+        return False
+    mismatches = 0
+    for expected, actual in zip(pattern, syllables[start:start + len(pattern)]):
+        if expected != actual:
+            if not similar_syllables(expected, actual):
+                return False
+            mismatches += 1
+    return mismatches <= limit
+
+
+def edit_distance_in(pattern, text):
+    """pattern与text中任意子串之间的最小编辑距离"""
+    previous = list(range(len(pattern) + 1))
+    best = previous[-1]
+    for token in text:
+        current = [0]
+        for i, syllable in enumerate(pattern, 1):
+            current.append(min(previous[i] + 1, current[i - 1] + 1, previous[i - 1] + (syllable != token)))
+        best = min(best, current[-1])
+        previous = current
+    return best
+
+
+class WakeWordMatcher:
+    def __init__(self, words, max_distance=1):
+        self.words = list(words)
+        self.patterns = []
+        self.distances = []
+        self.near_limits = []
+        # Aho-Corasick自动机：goto[state]为子节点表，fail为失配跳转，output为在该状态结束的片段
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for index, word in enumerate(self.words):
+            pattern = to_syllables(word)
+            # 两个音节的唤醒词不允许增删，近音替换也至少保留一个音节完全一致，避免单个音节即可唤醒
+            distance = min(max_distance, len(pattern) // 3)
+            near_limit = min(max_distance, len(pattern) - 1)
+            self.patterns.append(pattern)
+            self.distances.append(distance)
+            self.near_limits.append(near_limit)
+            for start, end in self._pieces(len(pattern), max(distance, near_limit) + 1):
+                self._insert(pattern[start:end], (index, start, end - start))
+        self._build()
+
+    @staticmethod
+    def _pieces(length, count):
+        # 切成count段，编辑距离不超过count-1时至少有一段原样出现
+        bounds = [length * i // count for i in range(count + 1)]
+        return [(bounds[i], bounds[i + 1]) for i in range(count) if bounds[i] < bounds[i + 1]]
+
+    def _insert(self, piece, entry):
+        state = 0
+        for syllable in piece:
+            if syllable not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[state][syllable] = len(self.goto) - 1
+            state = self.goto[state][syllable]
+        self.output[state].append(entry)
+
+    def _build(self):
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for syllable, child in self.goto[state].items():
+                queue.append(child)
+                if state:
+                    fallback = self.fail[state]
+                    while fallback and syllable not in self.goto[fallback]:
+                        fallback = self.fail[fallback]
+                    self.fail[child] = self.goto[fallback].get(syllable, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def search(self, text):
+        """返回识别结果中匹配到的第一个唤醒词，没有时返回None"""
+        syllables = to_syllables(text)
+        verified = set()
+        state = 0
+        for position, syllable in enumerate(syllables):
+            while state and syllable not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(syllable, 0)
+            for index, offset, size in self.output[state]:
+                distance = self.distances[index]
+                near_limit = self.near_limits[index]
+                if distance == 0 and near_limit == 0:
+                    return self.words[index]
+                # 片段命中后，只在唤醒词可能所在的窗口内验证
+                start = position - size + 1 - offset
+                if (index, start) in verified:
+                    continue
+                verified.add((index, start))
+                pattern = self.patterns[index]
+                if near_match_at(pattern, syllables, start, near_limit):
+                    return self.words[index]
+                if distance:
+                    window = syllables[max(0, start - distance):start + len(pattern) + distance]
+                    if edit_distance_in(pattern, window) <= distance:
+                        return self.words[index]
+        return None